@@ -1,3 +1,4 @@
+from functools import lru_cache
 from yaml import safe_load
 import pathlib
 
@@ -13,4 +14,17 @@ def load_config():
     return config
 
 
+@lru_cache(maxsize=None)
+def load_env():
+    """Load .env into os.environ, once per process and only when first needed."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+
 config = load_config()
+
+# Raw CSV file of every table: a <NAME>_TABLE key names a table and <NAME>_PATH is its file
+# name, which is also the environment variable main.py reads the file's path from.
+TABLE_PATH_KEYS = {config[key]: f"{key.removesuffix('_TABLE')}_PATH" for key in config
+                   if key.endswith('_TABLE') and f"{key.removesuffix('_TABLE')}_PATH" in config}
+TABLE_PATHS = {table_name: config[key] for table_name, key in TABLE_PATH_KEYS.items()}
@@ -1,9 +1,10 @@
 import logging
 import logging.config
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
+from config.config import load_env
+
+_configured = False
 
 LOGGING_CONFIG = {
     "version": 1,
@@ -26,7 +27,18 @@ LOGGING_CONFIG = {
     }
 }
 
-logging.config.dictConfig(LOGGING_CONFIG)
+
+def configure_logging():
+    """Apply LOGGING_CONFIG once, with LOG_LEVEL read from the environment or .env."""
+    global _configured
+    if _configured:
+        return
+    load_env()
+    level = os.getenv("LOG_LEVEL", "DEBUG")
+    LOGGING_CONFIG["handlers"]["console"]["level"] = level
+    LOGGING_CONFIG["root"]["level"] = level
+    logging.config.dictConfig(LOGGING_CONFIG)
+    _configured = True
 
 
 def get_logger(name=None):
@@ -34,7 +46,9 @@ def get_logger(name=None):
 
     Get a logger with the specified name.
     If no name is provided, uses the caller's module name.
+    Logging is configured on the first call.
     """
+    configure_logging()
     return logging.getLogger(name)
 
 
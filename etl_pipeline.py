@@ -1,12 +1,21 @@
-from dotenv import load_dotenv
+import os
+from datetime import datetime, timezone
 
+from config.config import config
 from config.log_config import get_logger
-from pipeline.data_cleaning import DataCleaningPipeline  # TRANSFORM
+from pipeline.data_cleaning import DataCleaningPipeline, set_copy_on_write  # TRANSFORM
 from pipeline.extractor import DataExtractor  # EXTRACT
+from pipeline.cleaning_cache import CleanedTableCache
+from pipeline.integrity import ReferentialIntegrityValidator
+from pipeline.incremental import (IncrementalState, file_fingerprint, keys_at_watermark, keys_without_watermark,
+                                  max_watermark, split_at_watermark)
 from pipeline.loader import DataLoader  # LOAD
+from pipeline.metrics import NO_METRICS, RunMetrics
+from pipeline.prefetch import prefetch
+from pipeline.compaction import restore_dtypes
+from pipeline.schema import merge_keys, primary_keys, referenced_keys
 
 logger = get_logger(__name__)
-load_dotenv()
 
 
 class ETLPipeline:
@@ -15,8 +24,13 @@ class ETLPipeline:
     input kwargs must be like:
     extractor_pipeline_args = {
         'extractor_source': 'source_str',
-        'file_paths': {'customers': 'customers.csv'}
+        'file_paths': {'customers': 'customers.csv'},
+        'tables': {'ORDERS': 'raw.orders'},  # optional, what to read when the source is 'postgres'
+        'chunk_size': 100000,  # optional, streams every stage chunk by chunk
+        'pipelined': True,  # optional, with chunk_size runs the three stages concurrently
+        'incremental': True  # optional, only processes changed files and new rows
     }
+    connector: optional engine shared by the loads of every run, left open for its owner
     """
 
     def __init__(self, **kwargs):
@@ -27,30 +41,272 @@ class ETLPipeline:
         self.extractor_settings = kwargs.get("extractor_pipeline_args", {})
         self.cleaning_settings = kwargs.get("cleaning_pipeline_args", {})
         self.loading_settings = kwargs.get("loading_pipeline_args", {})
+        self.connector = kwargs.get("connector")
+        self.run_id = None
+        self.metrics = NO_METRICS
 
+    def _cleaning_args(self) -> dict:
+        """Metrics and, when PROFILE_CLEANERS is set, the cProfile directory for DataCleaningPipeline."""
+        args = {'metrics': self.metrics}
+        if config['PROFILE_CLEANERS']:
+            args['profile_dir'] = os.path.join(config['METRICS_DIR'], 'profiles', self.run_id)
+        return args
 
+    def _export_metrics(self, success: bool):
+        """Write the run report; a failing export never hides the outcome of the run."""
+        self.metrics.finish(success)
+        try:
+            self.metrics.export()
+        except Exception as e:
+            logger.warning(f"Could not write run metrics: {e}")
+
+    def _cleaning_cache_args(self) -> dict:
+        """Cache arguments for DataCleaningPipeline when CLEANING_CACHE is enabled."""
+        if not config['CLEANING_CACHE'] or self.extractor_settings.get('extractor_source') != 'CSV':
+            return {}
+        return {
+            'cache': CleanedTableCache(),
+            'source_hashes': {table_name: file_fingerprint(path)['sha256']
+                              for table_name, path in self.extractor_settings.get('file_paths').items()}
+        }
+
+    def _check_integrity(self, tables: dict, loaded: dict = None) -> dict:
+        """Drop and quarantine rows violating the schema's foreign keys, when enabled.
+        `loaded` holds the keys of parent rows loaded by earlier runs, see ReferentialIntegrityValidator.validate."""
+        if not config['REFERENTIAL_INTEGRITY']:
+            return tables
+        return ReferentialIntegrityValidator().validate(tables, loaded)
+
+    @staticmethod
+    def _row_key_columns(table_name: str, df) -> list[str]:
+        """Primary key columns of the raw table, or all of its columns when it declares none."""
+        keys = primary_keys().get(table_name.lower(), [])
+        return keys if keys and set(keys) <= set(df.columns) else list(df.columns)
+
+    def _merges_on_keys(self, table_name: str) -> bool:
+        """Whether loading the table merges it on its keys, so reloading rows does not duplicate them."""
+        return (self.loading_settings.get('source') in ('postgres', 'snowflake') and config['LOAD_MODE'] == 'merge'
+                and table_name.lower() in merge_keys())
+
+    def _loaded_parent_keys(self, state: IncrementalState, earlier: dict) -> dict:
+        """Keys of the rows earlier runs loaded into the tables that foreign keys reference.
+
+        Rows those runs rejected in cleaning or quarantined are not among them, so their
+        children arriving later are orphans. A state written before keys were stored has
+        none: the raw rows the earlier runs processed stand in for them once, when the
+        table changes, and become the stored baseline.
+        """
+        parents = {}
+        for table_name in self.extractor_settings.get('file_paths'):
+            columns = referenced_keys().get(table_name.lower())
+            if columns is None:
+                continue
+            keys = state.loaded_keys(table_name)
+            if keys is None and table_name in state.tables:
+                if table_name not in earlier:
+                    continue
+                logger.warning(f"{table_name}: the state holds no loaded keys yet, taking the raw rows of "
+                               f"earlier runs as loaded")
+                state.add_loaded_keys(table_name, earlier[table_name][columns])
+                keys = state.loaded_keys(table_name)
+            if keys is not None:
+                parents[table_name] = keys
+        return parents
 
     def run(self):
-        """Run the complete ETL pipeline."""
+        """Run the complete ETL pipeline.
+
+        With METRICS enabled, the time, rows and peak memory of every stage and table
+        are written to METRICS_DIR and METRICS_PROMETHEUS_FILE, also when the run fails.
+        """
+        set_copy_on_write()
+        self.run_id = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        self.metrics = RunMetrics(self.run_id) if config['METRICS'] else NO_METRICS
+        success = False
+        try:
+            if self.extractor_settings.get('incremental'):
+                self.run_incremental()
+            elif self.extractor_settings.get('chunk_size'):
+                self.run_streaming()
+            else:
+                self.run_batch()
+            success = True
+        finally:
+            self._export_metrics(success)
+
+    def run_batch(self):
+        """Extract, clean and load every table in memory at once."""
         try:
             logger.info("🚀 Starting ETL pipeline")
 
             ext = DataExtractor(
                 source=self.extractor_settings.get('extractor_source'),
-                file_paths=self.extractor_settings.get('file_paths')
+                file_paths=self.extractor_settings.get('file_paths'),
+                tables=self.extractor_settings.get('tables'),
+                metrics=self.metrics
             ).extract()
 
             logger.info("📥 Data extraction completed and 🔄 Starting data transformation")
-            transformer = DataCleaningPipeline(ext).run()
+            transformer = self._check_integrity(
+                DataCleaningPipeline(ext, **self._cleaning_cache_args(), **self._cleaning_args()).run())
 
             logger.info("🧹 Data transformation completed and 💾 Starting data loading")
             DataLoader(
                 source=self.loading_settings.get('source'),
                 dataframe_table_mapping=transformer,
-                schema=self.loading_settings.get('schema')
+                schema=self.loading_settings.get('schema'),
+                metrics=self.metrics,
+                connector=self.connector
             ).load_data()
             logger.info("✅ Data loading completed successfully")
 
         except Exception as e:
             logger.error(f"ETL pipeline failed: {e}")
             raise
+
+    def run_streaming(self):
+        """Run the ETL pipeline chunk by chunk so peak memory follows the chunk size.
+
+        When 'pipelined' is set, extraction and cleaning run on background threads that
+        stay up to PIPELINE_QUEUE_SIZE chunks ahead of the next stage, so reading,
+        cleaning and loading overlap and the wall time approaches that of the slowest
+        stage. A failure in any stage stops the others and is raised here.
+        """
+        pipelined = self.extractor_settings.get('pipelined')
+        chunks = cleaned_chunks = None
+        try:
+            logger.info(f"🚀 Starting {'pipelined' if pipelined else 'streaming'} ETL pipeline "
+                        f"({self.extractor_settings['chunk_size']} rows per chunk)")
+
+            chunks = DataExtractor(
+                source=self.extractor_settings.get('extractor_source'),
+                file_paths=self.extractor_settings.get('file_paths'),
+                tables=self.extractor_settings.get('tables'),
+                chunk_size=self.extractor_settings['chunk_size'],
+                metrics=self.metrics
+            ).extract_chunks()
+            if pipelined:
+                chunks = prefetch(chunks, name='extract')
+
+            cleaned_chunks = DataCleaningPipeline(chunks, metrics=self.metrics).run_stream()
+            if pipelined:
+                cleaned_chunks = prefetch(cleaned_chunks, name='clean')
+
+            DataLoader(
+                source=self.loading_settings.get('source'),
+                dataframe_table_mapping=cleaned_chunks,
+                schema=self.loading_settings.get('schema'),
+                metrics=self.metrics,
+                connector=self.connector
+            ).load_stream()
+            logger.info("✅ Streaming ETL pipeline completed successfully")
+
+        except Exception as e:
+            logger.error(f"ETL pipeline failed: {e}")
+            raise
+        finally:
+            # downstream first, so the cleaning thread is gone before its input is closed
+            for stage in (cleaned_chunks, chunks):
+                if stage is not None:
+                    stage.close()
+
+    def run_incremental(self):
+        """Run the ETL pipeline on new data only.
+
+        Tables whose raw file is unchanged since the last successful run are skipped.
+        For tables with a column in INCREMENTAL_WATERMARKS only rows newer than the
+        stored high-water mark are cleaned and loaded, plus rows at the mark whose
+        primary key was not seen by earlier runs. Other tables must only grow
+        between runs: the rows past those processed last time are loaded. A rewritten
+        file of such a table is reprocessed in full when it is merged into a database
+        on its primary key, and refused otherwise, since appending it again would
+        duplicate its rows. New rows are appended to the target, CSV files included.
+        The state is saved only after loading succeeded.
+        """
+        if self.extractor_settings.get('extractor_source') != 'CSV':
+            raise ValueError("Incremental runs track raw files and need the CSV source; for postgres, "
+                             "push the watermark down with a 'where' clause in the table spec.")
+        if self.loading_settings.get('source') in ('parquet', 'feather'):
+            raise ValueError("Incremental runs append new rows, but the parquet and feather sinks replace "
+                             "whole tables; use a batch run for these targets.")
+        try:
+            logger.info("🚀 Starting incremental ETL pipeline")
+            state = IncrementalState()
+            watermark_columns = config['INCREMENTAL_WATERMARKS']
+
+            changed_paths, fingerprints = {}, {}
+            for table_name, path in self.extractor_settings.get('file_paths').items():
+                fingerprint = state.changed_fingerprint(table_name, path)
+                if fingerprint is None:
+                    logger.info(f"⏭️ {table_name} is unchanged since the last run, skipping")
+                    continue
+                changed_paths[table_name] = path
+                fingerprints[table_name] = fingerprint
+
+            if not changed_paths:
+                state.save()
+                logger.info("✅ Nothing changed since the last run")
+                return
+
+            ext = DataExtractor(
+                source=self.extractor_settings.get('extractor_source'),
+                file_paths=changed_paths,
+                metrics=self.metrics
+            ).extract()
+
+            # rows processed by earlier runs are split off
+            new_watermarks, earlier, rows = {}, {}, {}
+            for table_name, df in ext.items():
+                rows[table_name] = len(df)
+                column = watermark_columns.get(table_name)
+                if column is not None:
+                    keys = self._row_key_columns(table_name, df)
+                    earlier[table_name], ext[table_name] = split_at_watermark(
+                        df, column, state.watermark(table_name), keys, state.watermark_keys(table_name),
+                        state.undated_keys(table_name))
+                    new_watermarks[table_name] = {'undated_keys': keys_without_watermark(ext[table_name], column, keys)}
+                    watermark = max_watermark(ext[table_name], column)
+                    if watermark is not None:
+                        new_watermarks[table_name].update(
+                            watermark=watermark, watermark_keys=keys_at_watermark(df, column, watermark, keys))
+                    logger.info(f"{table_name}: {len(ext[table_name])} of {len(df)} rows are new since the watermark")
+                    continue
+
+                offset = state.processed_rows(table_name, changed_paths[table_name])
+                if offset is None:
+                    if not self._merges_on_keys(table_name):
+                        raise ValueError(f"{table_name} was rewritten since the last run and has no column in "
+                                         "INCREMENTAL_WATERMARKS, so its new rows cannot be told apart and "
+                                         "loading it again would duplicate rows. Run a batch load, or merge "
+                                         "into a database with LOAD_MODE 'merge'.")
+                    logger.info(f"{table_name} was rewritten since the last run, merging it in full")
+                    offset = 0
+                earlier[table_name], ext[table_name] = df.iloc[:offset], df.iloc[offset:]
+                logger.info(f"{table_name}: {len(ext[table_name])} of {len(df)} rows were added since the last run")
+
+            logger.info("📥 Data extraction completed and 🔄 Starting data transformation")
+            transformer = self._check_integrity(DataCleaningPipeline(ext, **self._cleaning_args()).run(),
+                                                self._loaded_parent_keys(state, earlier))
+
+            logger.info("🧹 Data transformation completed and 💾 Starting data loading")
+            DataLoader(
+                source=self.loading_settings.get('source'),
+                dataframe_table_mapping={name: df for name, df in transformer.items() if not df.empty},
+                schema=self.loading_settings.get('schema'),
+                metrics=self.metrics,
+                connector=self.connector,
+                append_files=True
+            ).load_data()
+
+            for table_name, df in transformer.items():
+                columns = referenced_keys().get(table_name.lower())
+                if columns is not None and not df.empty:
+                    state.add_loaded_keys(table_name, restore_dtypes(df)[columns])
+            for table_name, fingerprint in fingerprints.items():
+                state.update(table_name, fingerprint, rows[table_name], **new_watermarks.get(table_name, {}))
+            state.save()
+            logger.info("✅ Incremental data loading completed successfully")
+
+        except Exception as e:
+            logger.error(f"ETL pipeline failed: {e}")
+            raise
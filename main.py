@@ -1,38 +1,109 @@
-from etl_pipeline import ETLPipeline
-from config.config import config
+"""Command line entry point of the Olist ETL pipeline.
 
+    python main.py                                  # one run, configured by .env and config.yaml
+    python main.py --target parquet --streaming     # override LOAD_SOURCE and STREAMING
+    python main.py --daemon                         # keep running, see scheduled_run_etl.py
+    python main.py --check                          # raw files present, target database reachable
+
+Only argparse and the configuration are imported up front. pandas and the database
+drivers are imported when a run needs them, so --help and --check start quickly and a
+CSV-only run never loads the Snowflake connector.
+"""
+
+import argparse
 import os
-from dotenv import load_dotenv
+import sys
 
-load_dotenv()
+from config.config import TABLE_PATH_KEYS, config, load_env
 
 
-### it's possible to add logics related to run this pipeline with intervals
-if __name__ == "__main__":
+def pipeline_kwargs(*, target: str = None, schema: str = None, streaming: bool = config['STREAMING'],
+                    pipelined: bool = config['PIPELINED'], incremental: bool = config['INCREMENTAL'],
+                    chunk_size: int = config['STREAM_CHUNK_SIZE']) -> dict:
+    """ETLPipeline arguments from the environment and config/config.yaml.
 
-    kwargs = {
+    Args:
+        target (str, optional): Load target, defaults to LOAD_SOURCE.
+        schema (str, optional): Target schema, defaults to LOAD_SCHEMA.
+        streaming (bool): Stream every stage in chunks of chunk_size rows.
+        pipelined (bool): Stream with the three stages running concurrently.
+        incremental (bool): Only process changed files and new rows.
+        chunk_size (int): Rows per chunk when streaming or pipelined.
+    """
+    load_env()
+    return {
         'extractor_pipeline_args': {
             'extractor_source': os.getenv('EXTRACT_SOURCE'),
-            'file_paths': {
-                        config['CUSTOMERS_TABLE']: os.getenv('CUSTOMERS_PATH'),
-                        config['GEOLOCATION_TABLE']: os.getenv('GEOLOCATION_PATH'),
-                        config['ORDERS_TABLE']: os.getenv('ORDERS_PATH'),
-                        config['ORDER_ITEMS_TABLE']: os.getenv('ORDER_ITEMS_PATH'),
-                        config['ORDER_PAYMENTS_TABLE']: os.getenv('ORDER_PAYMENTS_PATH'),
-                        config['ORDER_REVIEWS_TABLE']: os.getenv('ORDER_REVIEWS_PATH'),
-                        config['PRODUCTS_TABLE']: os.getenv('PRODUCTS_PATH'),
-                        config['CATEGORIES_TABLE']: os.getenv('CATEGORIES_PATH'),
-                        config['SELLERS_TABLE']: os.getenv('SELLERS_PATH')
-                            }
+            'file_paths': {table_name: os.getenv(variable) for table_name, variable in TABLE_PATH_KEYS.items()},
+            'chunk_size': chunk_size if streaming or pipelined else None,
+            'pipelined': pipelined,
+            'incremental': incremental
                 },
         'loading_pipeline_args': {
-            'source': os.getenv('LOAD_SOURCE'),
-            'schema': os.getenv('LOAD_SCHEMA')
+            'source': target or os.getenv('LOAD_SOURCE'),
+            'schema': schema or os.getenv('LOAD_SCHEMA')
                 }
     }
 
 
-    ETLPipeline(**kwargs).run()
+def health_check(kwargs: dict) -> int:
+    """Check that every raw file exists and the source and target databases answer. Returns the exit code."""
+    problems = []
+    source = kwargs['extractor_pipeline_args']['extractor_source']
+    if source == 'CSV':
+        for table_name, path in kwargs['extractor_pipeline_args']['file_paths'].items():
+            if not path or not os.path.isfile(path):
+                problems.append(f"{table_name}: raw file {path!r} not found")
+
+    for role, backend in (('source', source), ('target', kwargs['loading_pipeline_args']['source'])):
+        try:
+            from pipeline.backends import is_database
+
+            if backend is None:
+                problems.append(f"{'EXTRACT_SOURCE' if role == 'source' else 'LOAD_SOURCE'} is not set")
+            elif is_database(backend):
+                from sqlalchemy import text
+                from pipeline.base_db_connection import get_engine
+
+                with get_engine(backend).connect() as connection:
+                    connection.execute(text("SELECT 1"))
+        except Exception as e:
+            problems.append(f"{role} {backend}: {e}")
+
+    for problem in problems:
+        print(f"FAIL {problem}")
+    print("OK" if not problems else f"{len(problems)} problem(s) found")
+    return 1 if problems else 0
 
 
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', help="load target, e.g. postgres, snowflake, CSV, parquet (default: LOAD_SOURCE)")
+    parser.add_argument('--schema', help="target schema (default: LOAD_SCHEMA)")
+    parser.add_argument('--streaming', action=argparse.BooleanOptionalAction, default=config['STREAMING'])
+    parser.add_argument('--pipelined', action=argparse.BooleanOptionalAction, default=config['PIPELINED'])
+    parser.add_argument('--incremental', action=argparse.BooleanOptionalAction, default=config['INCREMENTAL'])
+    parser.add_argument('--chunk-size', type=int, default=config['STREAM_CHUNK_SIZE'])
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--daemon', action='store_true', help="run on an interval and on raw file changes")
+    mode.add_argument('--check', action='store_true', help="health check without running the pipeline")
+    args = parser.parse_args(argv)
 
+    kwargs = pipeline_kwargs(target=args.target, schema=args.schema, streaming=args.streaming,
+                             pipelined=args.pipelined, incremental=args.incremental, chunk_size=args.chunk_size)
+    if args.check:
+        return health_check(kwargs)
+
+    if args.daemon:
+        from scheduled_run_etl import ETL
+
+        ETL(**kwargs).serve()
+    else:
+        from etl_pipeline import ETLPipeline
+
+        ETLPipeline(**kwargs).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
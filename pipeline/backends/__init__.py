@@ -0,0 +1,34 @@
+"""Plain connection modules of the data sources, each imported only when a run uses it.
+
+Each module defines:
+    DATABASE (bool): True when the source is reached through a SQLAlchemy engine.
+    engine_url() -> str: connection URL built from the environment (databases only).
+
+This is what get_engine needs and nothing more: keeping drivers such as
+snowflake.sqlalchemy inside their module means a CSV-only run never imports them.
+How each source is read and written stays in DataExtractor and DataLoader, which
+validate and dispatch on the source names themselves.
+"""
+
+import importlib
+from types import ModuleType
+
+_BACKENDS: dict[str, str] = {
+    'CSV': 'pipeline.backends.files',
+    'parquet': 'pipeline.backends.files',
+    'feather': 'pipeline.backends.files',
+    'postgres': 'pipeline.backends.postgres',
+    'snowflake': 'pipeline.backends.snowflake',
+}
+
+
+def get_backend(name: str) -> ModuleType:
+    """Import and return the connection module of a source."""
+    module = _BACKENDS.get(name)
+    if module is None:
+        raise ValueError(f"Unknown source '{name}'. Supported sources are: {', '.join(_BACKENDS)}.")
+    return importlib.import_module(module)
+
+
+def is_database(name: str) -> bool:
+    return get_backend(name).DATABASE
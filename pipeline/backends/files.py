@@ -0,0 +1,3 @@
+"""File backends: CSV, Parquet and Feather, read and written without a database engine."""
+
+DATABASE = False
@@ -0,0 +1,10 @@
+"""PostgreSQL backend, through psycopg2."""
+
+import os
+
+DATABASE = True
+
+
+def engine_url() -> str:
+    return (f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+            f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}")
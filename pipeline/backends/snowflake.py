@@ -0,0 +1,19 @@
+"""Snowflake backend. Importing it loads the Snowflake connector and registers its
+SQLAlchemy dialect, which is the slowest import of the project."""
+
+import os
+
+from snowflake.sqlalchemy import URL
+
+DATABASE = True
+
+
+def engine_url() -> str:
+    return URL(
+        user=os.getenv('SNOWFLAKE_USER'),
+        password=os.getenv('SNOWFLAKE_PASSWORD'),
+        account=os.getenv('SNOWFLAKE_ACCOUNT'),
+        database=os.getenv('SNOWFLAKE_DATABASE'),
+        schema=os.getenv('SNOWFLAKE_SCHEMA'),
+        warehouse=os.getenv('SNOWFLAKE_WAREHOUSE')
+    )
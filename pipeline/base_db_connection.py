@@ -1,11 +1,63 @@
+import atexit
+import threading
+from typing import TYPE_CHECKING
 
-from sqlalchemy import create_engine
-from snowflake.sqlalchemy import URL
+from config.config import config, load_env
+from config.log_config import get_logger
+from pipeline.backends import get_backend, is_database
 
-import os
-from dotenv import load_dotenv
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+
+logger = get_logger(__name__)
+
+# One pooled engine per backend and credentials, shared by every extractor and loader of
+# the process. Engines are thread-safe; each thread checks out its own pooled connection.
+_engines: dict[tuple[str, str], "Engine"] = {}
+_engines_lock = threading.Lock()
+
+
+def _engine_url(source: str) -> str:
+    backend = get_backend(source)
+    if not backend.DATABASE:
+        raise ValueError(f"'{source}' is a file source and has no database engine.")
+    load_env()
+    return backend.engine_url()
+
+
+def get_engine(source: str) -> "Engine":
+    """Return the process-wide engine for a database source, creating it on first use.
+
+    The engine is keyed by the source and its connection URL, so changed credentials
+    get a new engine. Pool settings come from DB_POOL_*; engines are disposed at exit.
+    """
+    url = _engine_url(source)
+    key = (source, url)
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            from sqlalchemy import create_engine
+
+            engine = create_engine(
+                url,
+                pool_size=config['DB_POOL_SIZE'],
+                max_overflow=config['DB_POOL_MAX_OVERFLOW'],
+                pool_pre_ping=config['DB_POOL_PRE_PING'],
+                pool_recycle=config['DB_POOL_RECYCLE_SECONDS']
+            )
+            _engines[key] = engine
+            logger.info(f"Created pooled {source} engine (pool size {config['DB_POOL_SIZE']}).")
+        return engine
+
+
+@atexit.register
+def dispose_engines():
+    """Close the pooled connections of every engine in the registry."""
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
 
-load_dotenv()
 
 class BaseDBConnection:
     def __init__(self, source: str):
@@ -13,43 +65,16 @@ class BaseDBConnection:
         self.connector = None
 
     def _connection(self):
-        """Create a connection to the data source."""
+        """Return the shared engine of the data source (None for files)."""
 
-        if self.source == 'CSV':
+        if not is_database(self.source):
             self.connector = None
             return None
 
-        if self.source == 'postgres':
-            engine = create_engine(f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}")
-            self.connector = engine
-            return engine
-
-        elif self.source == 'snowflake':
-            engine = create_engine(URL(
-                user=os.getenv('SNOWFLAKE_USER'),
-                password=os.getenv('SNOWFLAKE_PASSWORD'),
-                account=os.getenv('SNOWFLAKE_ACCOUNT'),
-                database=os.getenv('SNOWFLAKE_DATABASE'),
-                warehouse=os.getenv('SNOWFLAKE_WAREHOUSE')
-            ))
-
-            engine = create_engine(
-                'snowflake://{user}:{password}@{account}/{database}/{schema}?warehouse={warehouse}'.format(
-                    user=os.getenv("SNOWFLAKE_USER"),
-                    password=os.getenv("SNOWFLAKE_PASSWORD"),
-                    account=os.getenv("SNOWFLAKE_ACCOUNT"),
-                    database=os.getenv("SNOWFLAKE_DATABASE"),
-                    schema=os.getenv("SNOWFLAKE_SCHEMA"),
-                    warehouse=os.getenv("SNOWFLAKE_WAREHOUSE")
-                )
-            )
-
-            self.connector = engine
-            return engine
+        self.connector = get_engine(self.source)
+        return self.connector
 
     def _close_connection(self):
-        if self.connector is not None:
-            if hasattr(self.connector, 'dispose'):
-                self.connector.dispose()
-            else:
-                self.connector.close()
+        """Release this object's engine. Shared engines stay open for later loads and are
+        disposed at process exit; connections are returned to the pool by their `with` blocks."""
+        self.connector = None
@@ -0,0 +1,121 @@
+"""Content-addressed cache of cleaned tables, stored as Parquet files.
+
+A cached table is keyed by the content hash of its raw file, the source code of the
+cleaner classes and engines, the table's data_type_mapping and CLEANING_RULES, so any
+change to the input or the cleaning logic misses the cache. The least recently used entries are
+evicted once the cache grows past its size limit.
+
+Manage it from the command line:
+    python -m pipeline.cleaning_cache --list
+    python -m pipeline.cleaning_cache --clear [--table ORDERS]
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import uuid
+from typing import Optional
+
+import pandas as pd
+
+from config.config import config
+from config.log_config import get_logger
+
+from .data_processors import engines, rules
+from .data_processors.base_cleaner import BaseDataCleaner, column_rename_mapping, data_type_mapping
+
+logger = get_logger(__name__)
+
+
+def cleaner_version(cleaner_class: type[BaseDataCleaner], table_name: str) -> str:
+    """Hash of everything besides the raw data that decides a table's cleaned output."""
+    digest = hashlib.sha256()
+    for cls in cleaner_class.__mro__:
+        if issubclass(cls, BaseDataCleaner):
+            digest.update(inspect.getsource(cls).encode())
+    digest.update(json.dumps(data_type_mapping.get(table_name), sort_keys=True).encode())
+    digest.update(json.dumps(column_rename_mapping.get(table_name), sort_keys=True).encode())
+    digest.update(json.dumps((config.get('CLEANING_RULES') or {}).get(table_name), sort_keys=True).encode())
+    digest.update(inspect.getsource(rules).encode())
+    digest.update(inspect.getsource(engines).encode())
+    return digest.hexdigest()
+
+
+class CleanedTableCache:
+    def __init__(self, directory: str = config['CLEANING_CACHE_DIR'],
+                 max_bytes: int = config['CLEANING_CACHE_MAX_MB'] * 2 ** 20):
+        """Initialize the cache.
+
+        Args:
+            directory (str): Directory holding one '<table>-<key>.parquet' file per entry.
+            max_bytes (int): Total size above which least recently used entries are evicted.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(table_name: str, cleaner_class: type[BaseDataCleaner], raw_hash: str) -> str:
+        return hashlib.sha256(f"{raw_hash}|{cleaner_version(cleaner_class, table_name)}".encode()).hexdigest()
+
+    def _path(self, table_name: str, key: str) -> str:
+        return os.path.join(self.directory, f"{table_name}-{key}.parquet")
+
+    def _entries(self) -> list[os.DirEntry]:
+        return [entry for entry in os.scandir(self.directory) if entry.name.endswith('.parquet')]
+
+    def get(self, table_name: str, key: str) -> Optional[pd.DataFrame]:
+        """Return the cached cleaned table, or None on a miss."""
+        path = self._path(table_name, key)
+        if not os.path.exists(path):
+            return None
+        os.utime(path)  # mark as recently used
+        logger.info(f"Cleaning cache hit for {table_name}")
+        return pd.read_parquet(path)
+
+    def put(self, table_name: str, key: str, df: pd.DataFrame):
+        """Store a cleaned table (write-then-rename), then evict down to max_bytes."""
+        path = self._path(table_name, key)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        df.to_parquet(temp_path)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry.stat().st_mtime)
+        total = sum(entry.stat().st_size for entry in entries)
+        while entries and total > self.max_bytes:
+            oldest = entries.pop(0)
+            total -= oldest.stat().st_size
+            os.remove(oldest.path)
+            logger.info(f"Evicted {oldest.name} from the cleaning cache")
+
+    def clear(self, table_name: Optional[str] = None) -> int:
+        """Invalidate every entry, or only those of one table. Returns the number removed."""
+        removed = 0
+        for entry in self._entries():
+            if table_name is None or entry.name.startswith(f"{table_name}-"):
+                os.remove(entry.path)
+                removed += 1
+        return removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or invalidate the cleaned-table cache.")
+    parser.add_argument('--list', action='store_true', help="list cached entries")
+    parser.add_argument('--clear', action='store_true', help="remove cached entries")
+    parser.add_argument('--table', help="limit --clear to one table")
+    args = parser.parse_args()
+
+    cache = CleanedTableCache()
+    if args.clear:
+        print(f"Removed {cache.clear(args.table)} cached tables from {cache.directory}")
+    else:
+        entries = sorted(cache._entries(), key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries:
+            print(f"{entry.stat().st_size / 2 ** 20:>10.1f} MiB  {entry.name}")
+        print(f"{len(entries)} entries, {sum(entry.stat().st_size for entry in entries) / 2 ** 20:.1f} MiB "
+              f"of {cache.max_bytes / 2 ** 20:.0f} MiB")
@@ -0,0 +1,109 @@
+"""Compact in-memory representation of cleaned tables.
+
+Low-cardinality string columns become categoricals, other string columns are stored
+in Arrow buffers when pyarrow is installed, and numeric columns are downcast to
+the smallest dtype holding every value exactly. The original dtypes are kept in
+df.attrs['original_dtypes'] so writers can restore them with restore_dtypes().
+"""
+
+import numpy as np
+import pandas as pd
+
+from config.config import config
+from config.log_config import get_logger
+
+logger = get_logger(__name__)
+
+ORIGINAL_DTYPES = 'original_dtypes'
+
+_SIGNED_INTS = ['int8', 'int16', 'int32']
+
+
+def _has_pyarrow() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _smallest_int(series: pd.Series, nullable: bool) -> str | None:
+    values = series.dropna()
+    if values.empty:
+        return None
+    low, high = values.min(), values.max()
+    for dtype in _SIGNED_INTS:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype.capitalize() if nullable else dtype
+    return None
+
+
+def _compact_dtype(series: pd.Series, category_ratio: float) -> str | None:
+    """The compact dtype for one column, or None to keep it as it is."""
+    dtype = series.dtype
+
+    if pd.api.types.is_string_dtype(dtype) and not isinstance(dtype, pd.CategoricalDtype):
+        distinct = series.nunique(dropna=True)
+        if len(series) and distinct <= category_ratio * len(series):
+            return 'category'
+        # mostly distinct values such as ids: one Arrow buffer instead of a Python object per value
+        if isinstance(dtype, pd.StringDtype) and dtype.storage == 'python' and _has_pyarrow():
+            return 'string[pyarrow]'
+
+    elif pd.api.types.is_integer_dtype(dtype) and dtype.itemsize > 1:
+        compact = _smallest_int(series, nullable=pd.api.types.is_extension_array_dtype(dtype))
+        if compact is not None and np.dtype(compact.lower()).itemsize < dtype.itemsize:
+            return compact
+
+    elif dtype == np.float64:
+        # only when float32 round-trips every value, e.g. 0.5 but not 29.99
+        values = series.to_numpy()
+        narrowed = values.astype(np.float32).astype(np.float64)
+        if np.array_equal(values, narrowed, equal_nan=True):
+            return 'float32'
+
+    return None
+
+
+def compact_dtypes(df: pd.DataFrame, *, category_ratio: float = config['COMPACT_CATEGORY_RATIO']) -> tuple[pd.DataFrame, int]:
+    """Return a compacted copy of df and the number of bytes it saves.
+
+    Args:
+        df (pd.DataFrame): A cleaned table.
+        category_ratio (float): String columns whose distinct values are at most this
+            fraction of the rows are dictionary-encoded as categoricals.
+    """
+    conversions = {}
+    for column in df.columns:
+        compact = _compact_dtype(df[column], category_ratio)
+        if compact is not None:
+            conversions[column] = compact
+
+    if not conversions:
+        return df, 0
+
+    before = df.memory_usage(deep=True).sum()
+    original = {column: str(df[column].dtype) for column in conversions}
+    compacted = df.astype(conversions)
+    compacted.attrs[ORIGINAL_DTYPES] = {**df.attrs.get(ORIGINAL_DTYPES, {}), **original}
+    return compacted, int(before - compacted.memory_usage(deep=True).sum())
+
+
+def restore_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """Undo compact_dtypes, e.g. before the table is created from the frame's dtypes."""
+    original = {column: dtype for column, dtype in df.attrs.get(ORIGINAL_DTYPES, {}).items() if column in df.columns}
+    if not original:
+        return df
+    restored = df.astype(original)
+    restored.attrs = {key: value for key, value in df.attrs.items() if key != ORIGINAL_DTYPES}
+    return restored
+
+
+def compact_tables(tables: dict[str, pd.DataFrame]) -> tuple[dict[str, pd.DataFrame], dict[str, int]]:
+    """Compact every table. Returns the tables and the bytes saved per table."""
+    compacted, saved = {}, {}
+    for table_name, df in tables.items():
+        compacted[table_name], saved[table_name] = compact_dtypes(df)
+        logger.info(f"Compacted {table_name}: {saved[table_name] / 2 ** 20:.1f} MiB saved")
+    return compacted, saved
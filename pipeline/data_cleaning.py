@@ -1,5 +1,14 @@
 # Main orchestrator for data cleaning operations"
-from typing import Dict, Type
+import cProfile
+import multiprocessing
+import os
+import sys
+import tempfile
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, Type
 
 import numpy as np
 import pandas as pd
@@ -7,9 +16,13 @@ import pandas as pd
 from config.config import config
 from config.log_config import get_logger
 
+from .cleaning_cache import CleanedTableCache
+from .compaction import compact_tables
+from .metrics import NO_METRICS, RunMetrics, StageRecord
 from .data_processors.base_cleaner import BaseDataCleaner
 from .data_processors.orders_table_cleaner import OrdersCleaner
 from .data_processors.customers_table_cleaner import CustomersCleaner
+from .data_processors.geolocation_table_cleaner import GeolocationCleaner
 from .data_processors.products_table_cleaner import ProductsCleaner
 
 logger = get_logger(__name__)
@@ -19,7 +32,7 @@ class DataCleaningFactory:
 
     cleaner_map: Dict[str, Type[BaseDataCleaner]] = {
         config['CUSTOMERS_TABLE']: CustomersCleaner,
-        config['GEOLOCATION_TABLE']: BaseDataCleaner,
+        config['GEOLOCATION_TABLE']: GeolocationCleaner,
 
         config['ORDERS_TABLE']: OrdersCleaner,
         config['ORDER_ITEMS_TABLE']: BaseDataCleaner,
@@ -37,15 +50,131 @@ class DataCleaningFactory:
 
 
     @classmethod
-    def create_cleaner(cls, table_name: str, dataframe: pd.DataFrame) -> BaseDataCleaner:
-        """Create appropriate cleaner for the table."""
+    def get_cleaner_class(cls, table_name: str) -> Type[BaseDataCleaner]:
+        """Return the cleaner class registered for the table."""
 
         cleaner_class = cls.cleaner_map.get(table_name)
         if not cleaner_class:
             raise ValueError(f"No cleaner available for table: {table_name}")
 
+        return cleaner_class
+
+    @classmethod
+    def create_cleaner(cls, table_name: str, dataframe: pd.DataFrame) -> BaseDataCleaner:
+        """Create appropriate cleaner for the table."""
+
+        cleaner_class = cls.get_cleaner_class(table_name)
         return cleaner_class(raw_data=dataframe, table_name=table_name)
 
+def _clean_table(table_name: str, dataframe: pd.DataFrame, track_memory: bool = False,
+                 profile_path: str = None) -> tuple[pd.DataFrame, dict | None]:
+    """Clean one table, optionally tracing the peak memory the cleaner allocates.
+
+    Returns the cleaned DataFrame and, when track_memory is set, a report with the
+    input size and the peak traced allocation in bytes. With a profile_path the
+    cleaner runs under cProfile and the stats are dumped there for pstats or snakeviz.
+    """
+    cleaner = DataCleaningFactory.create_cleaner(table_name=table_name, dataframe=dataframe)
+    if not track_memory and profile_path is None:
+        return cleaner.clean(), None
+
+    already_tracing = tracemalloc.is_tracing()
+    if track_memory:
+        if not already_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+
+    profiler = cProfile.Profile() if profile_path is not None else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        cleaned = cleaner.clean()
+        if track_memory:
+            _, peak = tracemalloc.get_traced_memory()
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(os.path.dirname(profile_path) or '.', exist_ok=True)
+            profiler.dump_stats(profile_path)
+            logger.info(f"{table_name} cleaning profile written to {profile_path}")
+        if track_memory and not already_tracing:
+            tracemalloc.stop()
+
+    if not track_memory:
+        return cleaned, None
+
+    report = {
+        'input_bytes': int(dataframe.memory_usage(deep=True).sum()),
+        'peak_bytes': peak - baseline,
+    }
+    logger.info(f"{table_name} cleaning peak memory: {report['peak_bytes'] / 2 ** 20:.1f} MiB "
+                f"for {report['input_bytes'] / 2 ** 20:.1f} MiB of input "
+                f"({report['peak_bytes'] / max(report['input_bytes'], 1):.2f}x)")
+    return cleaned, report
+
+
+def _write_ipc(df: pd.DataFrame, path: str) -> bool:
+    """Write a DataFrame to an Arrow IPC file. Returns False when Arrow cannot
+    represent it (e.g. mixed-type object columns) so the caller can fall back to pickling."""
+    import pyarrow as pa
+
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return False
+
+    with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return True
+
+
+def _read_ipc(path: str) -> pd.DataFrame:
+    """Read an Arrow IPC file through a memory map, zero-copy where the dtypes allow it."""
+    import pyarrow as pa
+
+    return pa.ipc.open_file(pa.memory_map(path, 'r')).read_all().to_pandas(split_blocks=True)
+
+
+def _clean_measured(metrics: RunMetrics, table_name: str, dataframe: pd.DataFrame, track_memory: bool,
+                    profile_path: str = None) -> tuple[pd.DataFrame, dict | None]:
+    """_clean_table, recording its time, rows and peak memory as a 'clean' stage."""
+    with metrics.stage('clean', table_name, rows_in=len(dataframe)) as record:
+        cleaned, report = _clean_table(table_name, dataframe, track_memory, profile_path)
+        record.rows_out = len(cleaned)
+        if report is not None:
+            record.extra['traced_peak_bytes'] = report['peak_bytes']
+    return cleaned, report
+
+
+def set_copy_on_write(enabled: bool = config['COPY_ON_WRITE']):
+    """Let the cleaners share column buffers with the raw frames until one is modified.
+
+    pandas options are process wide, so the entry points set it once (ETLPipeline.run,
+    the cleaning worker processes, the benchmark scripts) instead of an import doing so.
+    """
+    pd.set_option("mode.copy_on_write", enabled)
+
+
+def _pool_context():
+    """Polars' thread pool deadlocks in forked children, so once polars is loaded the
+    workers are spawned instead of forked."""
+    return multiprocessing.get_context('spawn') if 'polars' in sys.modules else None
+
+
+def _clean_in_worker(table_name: str, payload: str | pd.DataFrame, output_path: str, track_memory: bool,
+                     profile_path: str = None, measure: bool = False
+                     ) -> tuple[str | pd.DataFrame, dict | None, StageRecord | None]:
+    """Process-pool entry point: clean one table handed over as an Arrow IPC path (or a
+    pickled DataFrame) and hand the result back the same way. With measure set, the
+    worker's stage record is returned for the parent's metrics."""
+    dataframe = _read_ipc(payload) if isinstance(payload, str) else payload
+    metrics = RunMetrics() if measure else NO_METRICS
+    cleaned, report = _clean_measured(metrics, table_name, dataframe, track_memory, profile_path)
+    record = metrics.records.get(('clean', table_name)) if measure else None
+    return (output_path if _write_ipc(cleaned, output_path) else cleaned), report, record
+
+
 class DataCleaningPipeline:
     """ Main orchestrator for all cleaning operations.
         dataframes: A dictionary of DataFrames to clean.
@@ -53,22 +182,166 @@ class DataCleaningPipeline:
                 'orders': pd.DataFrame(...),
                 'customers': pd.DataFrame(...),
             }
+            For run_stream it may also be an iterable of (table_name, chunk) pairs,
+            with the chunks of each table arriving one after another.
+        workers: Number of processes cleaning tables in parallel; 1 cleans them in series.
+        shards: With workers > 1, split each table of at least shard_min_rows rows into this
+            many shards by its dedup key, cleaned in parallel and merged into the same result.
+        shard_min_rows: Smallest table that is sharded.
+        track_memory: Trace each cleaner's peak memory into memory_report.
+        cache: Cache of cleaned tables, used for the tables listed in source_hashes.
+        source_hashes: Content hash of each table's raw file, e.g. {'ORDERS': 'ab12...'}.
+        compact: Dictionary-encode low-cardinality strings and downcast numerics of the
+            tables returned by run(); bytes saved per table go to compaction_report.
+        metrics: Collects the time, rows and peak memory of every table cleaned.
+        profile_dir: Directory receiving a cProfile dump '<TABLE>.prof' of each cleaner run by run().
     """
 
-    def __init__(self, dataframes: dict[str, pd.DataFrame]):
+    def __init__(self, dataframes: dict[str, pd.DataFrame] | Iterable[tuple[str, pd.DataFrame]],
+                 *, workers: int = config['CLEANING_WORKERS'],
+                 shards: int = config['CLEANING_SHARDS'],
+                 shard_min_rows: int = config['CLEANING_SHARD_MIN_ROWS'],
+                 track_memory: bool = config['TRACK_CLEANING_MEMORY'],
+                 cache: CleanedTableCache = None, source_hashes: dict[str, str] = None,
+                 compact: bool = config['COMPACT_TABLES'],
+                 metrics: RunMetrics = NO_METRICS, profile_dir: str = None):
+        if workers < 1:
+            raise ValueError("workers must be at least 1.")
+        if shards < 1:
+            raise ValueError("shards must be at least 1.")
+
         self.dataframes = dataframes
+        self.workers = workers
+        self.shards = shards
+        self.shard_min_rows = shard_min_rows
+        self.track_memory = track_memory
+        self.cache = cache
+        self.source_hashes = source_hashes or {}
+        self.compact = compact
+        self.metrics = metrics
+        self.profile_dir = profile_dir
         self.cleaned_dataframes = {}
+        self.memory_report = {}
+        self.compaction_report = {}
+
+    def _profile_path(self, table_name: str) -> str | None:
+        return None if self.profile_dir is None else os.path.join(self.profile_dir, f"{table_name}.prof")
+
+    def _split(self, dataframes: dict[str, pd.DataFrame]) -> dict[str, tuple[BaseDataCleaner | None, list[pd.DataFrame]]]:
+        """The parts each table is cleaned in: its shards, with the cleaner merging them, or
+        the whole table."""
+        parts = {}
+        for table_name, df in dataframes.items():
+            if self.shards > 1 and len(df) >= self.shard_min_rows:
+                cleaner = DataCleaningFactory.create_cleaner(table_name, df)
+                parts[table_name] = (cleaner, cleaner.shards(self.shards))
+                logger.info(f"Cleaning data for table: {table_name} in {len(parts[table_name][1])} shards")
+            else:
+                parts[table_name] = (None, [df])
+        return parts
+
+    def _run_parallel(self, dataframes: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+        """Clean tables, or shards of large tables, in a process pool, passing DataFrames
+        through memory-mapped Arrow IPC files."""
+        parts = self._split(dataframes)
+        # largest parts first so they do not end up as the tail of the pool
+        tasks = sorted(((table_name, index, part) for table_name, (_, table_parts) in parts.items()
+                        for index, part in enumerate(table_parts)), key=lambda task: len(task[2]), reverse=True)
+
+        with tempfile.TemporaryDirectory(prefix="olist_cleaning_") as handoff_dir, \
+                ProcessPoolExecutor(max_workers=min(self.workers, len(tasks)), mp_context=_pool_context(),
+                                    initializer=set_copy_on_write) as executor:
+            futures = {}
+            for table_name, index, part in tasks:
+                sharded = len(parts[table_name][1]) > 1
+                name = f"{table_name}.{index}" if sharded else table_name
+                logger.info(f"Cleaning data for table: {name} (process pool)")
+                raw_path = os.path.join(handoff_dir, f"{name}.raw.arrow")
+                payload = raw_path if _write_ipc(part, raw_path) else part
+                futures[table_name, index] = executor.submit(
+                    _clean_in_worker, table_name, payload, os.path.join(handoff_dir, f"{name}.cleaned.arrow"),
+                    self.track_memory, self._profile_path(name), self.metrics.enabled)
+
+            cleaned = {}
+            for table_name, (cleaner, table_parts) in parts.items():
+                cleaned_parts = []
+                for index in range(len(table_parts)):
+                    result, report, record = futures[table_name, index].result()
+                    cleaned_parts.append(_read_ipc(result) if isinstance(result, str) else result)
+                    if report is not None:
+                        self._add_memory_report(table_name, report)
+                    if record is not None:
+                        self.metrics.add(record)
+                cleaned[table_name] = cleaned_parts[0] if cleaner is None else cleaner.merge_shards(cleaned_parts)
+            return cleaned
+
+    def _add_memory_report(self, table_name: str, report: dict):
+        """Shards of a table add up their input; their peaks are kept as the largest one."""
+        previous = self.memory_report.get(table_name)
+        self.memory_report[table_name] = report if previous is None else {
+            'input_bytes': previous['input_bytes'] + report['input_bytes'],
+            'peak_bytes': max(previous['peak_bytes'], report['peak_bytes']),
+        }
+
+    def _run_serial(self, dataframes: dict[str, pd.DataFrame]) -> dict[str, pd.DataFrame]:
+        cleaned = {}
+        for table_name, df in dataframes.items():
+            logger.info(f"Cleaning data for table: {table_name}")
+            cleaned[table_name], report = _clean_measured(self.metrics, table_name, df, self.track_memory,
+                                                          self._profile_path(table_name))
+            if report is not None:
+                self.memory_report[table_name] = report
+        return cleaned
+
+    def _cache_keys(self) -> dict[str, str]:
+        if self.cache is None:
+            return {}
+        return {
+            table_name: CleanedTableCache.key(table_name, DataCleaningFactory.get_cleaner_class(table_name), raw_hash)
+            for table_name, raw_hash in self.source_hashes.items() if table_name in self.dataframes
+        }
 
     def run(self) -> dict[str, pd.DataFrame]:
         """Execute the data cleaning pipeline."""
-        for table_name, df in self.dataframes.items():
-            logger.info(f"Cleaning data for table: {table_name}")
-            cleaner = DataCleaningFactory.create_cleaner(table_name=table_name, dataframe=df)
-            self.cleaned_dataframes[table_name] = cleaner.clean()
+        cache_keys = self._cache_keys()
+        cached = {}
+        for table_name, key in cache_keys.items():
+            hit = self.cache.get(table_name, key)
+            if hit is not None:
+                cached[table_name] = hit
+
+        to_clean = {name: df for name, df in self.dataframes.items() if name not in cached}
+        sharding = self.shards > 1 and any(len(df) >= self.shard_min_rows for df in to_clean.values())
+        if self.workers > 1 and (len(to_clean) > 1 or sharding):
+            cleaned = self._run_parallel(to_clean)
+        else:
+            cleaned = self._run_serial(to_clean)
+
+        for table_name, df in cleaned.items():
+            if table_name in cache_keys:
+                self.cache.put(table_name, cache_keys[table_name], df)
 
+        self.cleaned_dataframes = {name: cached[name] if name in cached else cleaned[name] for name in self.dataframes}
+        if self.compact:
+            self.cleaned_dataframes, self.compaction_report = compact_tables(self.cleaned_dataframes)
         logger.info("Data cleaning pipeline completed successfully.")
         return self.cleaned_dataframes
 
+    def run_stream(self) -> Iterator[tuple[str, pd.DataFrame]]:
+        """Clean (table_name, chunk) pairs lazily, yielding each cleaned chunk as it is ready."""
+        chunks = self.dataframes.items() if isinstance(self.dataframes, dict) else self.dataframes
+
+        yield from self.metrics.timed_iter('clean', self._clean_stream(chunks))
+        logger.info("Data cleaning stream completed successfully.")
+
+    @staticmethod
+    def _clean_stream(chunks: Iterable[tuple[str, pd.DataFrame]]) -> Iterator[tuple[str, pd.DataFrame]]:
+        for table_name, table_chunks in groupby(chunks, key=itemgetter(0)):
+            logger.info(f"Cleaning data stream for table: {table_name}")
+            cleaner_class = DataCleaningFactory.get_cleaner_class(table_name)
+            for cleaned_chunk in cleaner_class.clean_stream((chunk for _, chunk in table_chunks), table_name):
+                yield table_name, cleaned_chunk
+
 
 
 if __name__ == "__main__":
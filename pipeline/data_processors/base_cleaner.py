@@ -2,11 +2,14 @@
 """Abstract base class for all data cleaners."""
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Iterable, Iterator, List, Optional
+import numpy as np
 import pandas as pd
 
 from config.log_config import get_logger
 from config.config import config
+from .engines import ENGINES, PandasEngine, engine_name
+from .rules import RuleSet
 logger = get_logger(__name__)
 
 data_type_mapping = {
@@ -92,35 +95,207 @@ data_type_mapping = {
 }
 
 
+# Raw CSV column names that differ from the cleaned column names
+column_rename_mapping = {
+    config['PRODUCTS_TABLE']: {
+        'product_name_lenght': 'product_name_length',
+        'product_description_lenght': 'product_description_length'
+    }
+}
+
+
+class SeenKeys:
+    """Dedup keys already emitted for one table while it is cleaned chunk by chunk.
+
+    Keys are kept as a sorted array of 64-bit row hashes, so memory grows with the
+    number of distinct keys (8 bytes each) and not with the width of the rows.
+
+    Keys are compared by hash only: two distinct keys with the same 64-bit hash are
+    taken for one, and the later row is dropped as a duplicate. For n distinct keys
+    this happens with a probability of about n² / 2^65, 3e-8 for a million keys.
+    """
+
+    def __init__(self):
+        self._hashes = np.empty(0, dtype=np.uint64)
+
+    def filter_new(self, keys: pd.DataFrame) -> np.ndarray:
+        """Return a boolean mask of the rows whose key was not seen in an earlier chunk,
+        and remember those keys."""
+        hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+
+        if len(self._hashes):
+            positions = np.searchsorted(self._hashes, hashes).clip(max=len(self._hashes) - 1)
+            is_new = self._hashes[positions] != hashes
+        else:
+            is_new = np.ones(len(hashes), dtype=bool)
+
+        self._hashes = np.union1d(self._hashes, hashes[is_new])
+        return is_new
+
+
+def union_categories(frames: list[pd.DataFrame]) -> list[pd.DataFrame]:
+    """Give categorical columns whose categories differ between frames the sorted union of
+    their categories, the categories astype('category') gives the concatenated column."""
+    frames = list(frames)
+    if len(frames) < 2:
+        return frames
+    for column in frames[0].columns:
+        dtypes = [frame[column].dtype for frame in frames]
+        if isinstance(dtypes[0], pd.CategoricalDtype) and any(dtype != dtypes[0] for dtype in dtypes):
+            categories = dtypes[0].categories
+            for dtype in dtypes[1:]:
+                categories = categories.union(dtype.categories, sort=False)
+            dtype = pd.CategoricalDtype(categories.sort_values(), ordered=dtypes[0].ordered)
+            frames = [frame.assign(**{column: frame[column].astype(dtype)}) for frame in frames]
+    return frames
+
+
 class BaseDataCleaner(ABC):
+    # Columns identifying a duplicate row; None means the whole row.
+    # dedup_keys in CLEANING_RULES take precedence.
+    dedup_subset: Optional[List[str]] = None
+    # Engines able to run clean(); cleaners with custom pandas steps only list pandas
+    engines: tuple[str, ...] = tuple(ENGINES)
+
     def __init__(self, raw_data: pd.DataFrame, table_name: str):
-        self.raw_data = raw_data.copy()
-        self.cleaned_data = raw_data.copy()
+        # No defensive copies: clean() never modifies raw_data in place, it starts from
+        # the new frame returned by drop_duplicates.
+        self.raw_data = raw_data
+        self.cleaned_data = raw_data
         self.table_name = table_name
+        self.seen_keys: Optional[SeenKeys] = None
+        self.row_mask = None
+        self.rule_set = RuleSet.for_table(table_name)
+        self.rule_report: dict[str, int] = {}
+        if self.rule_set.dedup_keys is not None:
+            self.dedup_subset = self.rule_set.dedup_keys
+
+        name = engine_name(table_name)
+        if name not in self.engines:
+            raise ValueError(f"{type(self).__name__} cannot clean {table_name} with the {name} engine. "
+                             f"Supported engines are: {', '.join(self.engines)}.")
+        self.engine = ENGINES[name]()
+
+    @classmethod
+    def clean_stream(cls, chunks: Iterable[pd.DataFrame], table_name: str) -> Iterator[pd.DataFrame]:
+        """Clean a table chunk by chunk, keeping dedup correct across chunk boundaries.
+
+        Args:
+            chunks (Iterable[pd.DataFrame]): Consecutive chunks of the same table.
+            table_name (str): Name of the table the chunks belong to.
+        """
+        seen_keys = SeenKeys()
+        for chunk in chunks:
+            cleaner = cls(raw_data=chunk, table_name=table_name)
+            # chunks are small, and the seen keys are hashed by pandas
+            cleaner.engine = PandasEngine()
+            cleaner.seen_keys = seen_keys
+            yield cleaner.clean()
+
+    def shards(self, count: int) -> list[pd.DataFrame]:
+        """Split raw_data into at most count shards by a hash of the dedup key.
+
+        Every row of a key lands in the same shard, in raw order, so cleaning each shard
+        dedups exactly like clean() does on the whole table. Shards are indexed by their
+        rows' positions in raw_data, which merge_shards uses to restore the order.
+        """
+        keys = self.raw_data if self.dedup_subset is None else self.raw_data[self.dedup_subset]
+        shard_ids = pd.util.hash_pandas_object(keys, index=False).to_numpy() % count
+        order = np.argsort(shard_ids, kind='stable')
+        shards = []
+        for positions in np.split(order, np.cumsum(np.bincount(shard_ids, minlength=count))[:-1]):
+            if len(positions):
+                shard = self.raw_data.take(positions)
+                shard.index = positions
+                shards.append(shard)
+        return shards
+
+    def merge_shards(self, cleaned_shards: list[pd.DataFrame]) -> pd.DataFrame:
+        """Combine the cleaned shards of raw_data into the frame clean() returns for the
+        whole table: rows in raw order under their raw index, categories unioned.
+        Cleaners whose output rows do not map to raw rows override this."""
+        merged = pd.concat(union_categories(cleaned_shards))
+        order = np.argsort(merged.index.to_numpy(), kind='stable')
+        merged = merged.take(order)
+        merged.index = self.raw_data.index[merged.index.to_numpy()]
+        return merged
+
+    def drop_duplicates(self):
+        """Start cleaned_data from raw_data without the rows duplicating an earlier dedup key."""
+        self.cleaned_data = self.engine.drop_duplicates(self.engine.from_pandas(self.raw_data), self.dedup_subset)
+        return self
+
+    def rename_columns(self, columns: dict[str, str]):
+        self.cleaned_data = self.engine.rename(self.cleaned_data, columns)
+        return self
+
+    def drop_seen_keys(self):
+        """Drop rows whose dedup key was already emitted by an earlier chunk.
+
+        Runs after data_type_validation so keys hash the same whatever dtype the
+        reader inferred for a given chunk. No-op outside streaming mode.
+        """
+        if self.seen_keys is None:
+            return self
+
+        keys = self.cleaned_data if self.dedup_subset is None else self.cleaned_data[self.dedup_subset]
+        return self.keep_rows(self.seen_keys.filter_new(keys))
+
+    def keep_rows(self, mask: np.ndarray | pd.Series):
+        """Mark the rows of cleaned_data to keep. Masks are AND-ed together and only
+        applied by apply_row_filter, so validations never copy the frame themselves.
+        On the polars engine masks are Polars expressions."""
+        self.row_mask = self.engine.combine_masks(self.row_mask, mask)
+        return self
+
+    def apply_row_filter(self):
+        """Apply the accumulated row mask to cleaned_data in a single filter."""
+        if self.row_mask is not None:
+            self.cleaned_data = self.engine.filter(self.cleaned_data, self.row_mask)
+        self.row_mask = None
+        return self
+
+    def apply_rules(self):
+        """Evaluate the table's CLEANING_RULES as one fused mask, keeping the number of
+        rows each rule rejects in rule_report."""
+        if not self.rule_set:
+            return self
+
+        valid, self.rule_report = self.engine.evaluate_rules(self.cleaned_data, self.rule_set)
+        # lazy engines count the rejected rows when result() executes the query
+        if isinstance(self.rule_report, dict):
+            self._log_rule_report()
+        return self.keep_rows(valid)
+
+    def _log_rule_report(self):
+        for name, rejected in self.rule_report.items():
+            if rejected:
+                logger.info(f"{self.table_name}: rule '{name}' rejected {rejected} rows")
 
     def data_type_validation(self, mapping: dict):
-        for column, expected_type in mapping.items():
-            if column in self.cleaned_data.columns:
-                actual_type = self.cleaned_data[column].dtype
-                if actual_type != expected_type:
-                    try:
-                        self.cleaned_data[column] = self.cleaned_data[column].astype(expected_type)
-                    except ValueError:
-                        logger.error(f"Column '{column}' expected type {expected_type}, but got {actual_type}.")
-                        raise
+        self.cleaned_data = self.engine.cast(self.cleaned_data, mapping)
         logger.debug("Data type validation completed successfully.")
         return self
 
+    def result(self) -> pd.DataFrame:
+        """cleaned_data as a pandas frame, executing the query a lazy engine has built."""
+        deferred_report = not isinstance(self.rule_report, dict)
+        self.cleaned_data, self.rule_report = self.engine.to_pandas(self.cleaned_data, self.rule_report)
+        if deferred_report:
+            self._log_rule_report()
+        return self.cleaned_data
+
     @abstractmethod
     def clean(self) -> pd.DataFrame:
         """Must be implemented by subclasses."""
         pass
 
     def clean(self):
-        self.cleaned_data = self.raw_data.copy()
-        self.cleaned_data = self.cleaned_data.drop_duplicates(keep='first')
-
         (self
-            .data_type_validation(data_type_mapping.get(self.table_name)))
+            .drop_duplicates()
+            .data_type_validation(data_type_mapping.get(self.table_name))
+            .drop_seen_keys()
+            .apply_rules()
+            .apply_row_filter())
 
-        return self.cleaned_data
\ No newline at end of file
+        return self.result()
\ No newline at end of file
@@ -13,6 +13,8 @@ logger = get_logger(__name__)
 class CustomersCleaner(BaseDataCleaner):
     """Customers-specific cleaning logic."""
 
+    dedup_subset = ['customer_id']
+
     def __init__(self, raw_data: pd.DataFrame, table_name: str = "Customers"):
         super().__init__(raw_data, table_name)
 
@@ -22,12 +24,14 @@ class CustomersCleaner(BaseDataCleaner):
 
         try:
             # Execute cleaning pipeline step by step
-            self.cleaned_data = self.raw_data.copy()
-            self.cleaned_data = self.cleaned_data.drop_duplicates(subset=['customer_id'], keep='first')
-
             (self
-                .data_type_validation(data_type_mapping.get(self.table_name)))
+                .drop_duplicates()
+                .data_type_validation(data_type_mapping.get(self.table_name))
+                .drop_seen_keys()
+                .apply_rules()
+                .apply_row_filter())
 
+            self.result()
             logger.info("Customers cleaning process completed")
             return self.cleaned_data
 
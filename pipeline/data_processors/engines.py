@@ -0,0 +1,191 @@
+# data_processors/engines.py
+"""DataFrame engines running the shared steps of BaseDataCleaner.
+
+The cleaners write their pipeline once (drop_duplicates, rename_columns,
+data_type_validation, apply_rules, apply_row_filter) and the table's engine decides how
+each step runs:
+
+    pandas: eager, rules are NumPy masks. The default, and the only engine for cleaners
+            with custom pandas logic such as GeolocationCleaner.
+    polars: every step adds to one lazy Polars query per table, executed by result() on
+            Polars' multithreaded engine (optionally the streaming engine, which works
+            through the table in batches). The result converts back to the pandas frame,
+            dtypes and index the pandas engine produces.
+
+Engines are chosen per table in CLEANING_ENGINES:
+
+    CLEANING_ENGINES:
+      ORDER_REVIEWS: "polars"
+
+A new engine subclasses PandasEngine's interface and is added to ENGINES.
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import config
+from config.log_config import get_logger
+from .rules import RuleSet
+
+logger = get_logger(__name__)
+
+
+class PandasEngine:
+    name = 'pandas'
+
+    def from_pandas(self, df: pd.DataFrame) -> pd.DataFrame:
+        return df
+
+    def drop_duplicates(self, df: pd.DataFrame, subset: Optional[list[str]]) -> pd.DataFrame:
+        return df.drop_duplicates(subset=subset, keep='first')
+
+    def rename(self, df: pd.DataFrame, columns: dict[str, str]) -> pd.DataFrame:
+        return df.rename(columns=columns)
+
+    def cast(self, df: pd.DataFrame, mapping: dict[str, str]) -> pd.DataFrame:
+        for column, expected_type in mapping.items():
+            if column in df.columns:
+                actual_type = df[column].dtype
+                if actual_type != expected_type:
+                    try:
+                        df[column] = df[column].astype(expected_type)
+                    except ValueError:
+                        logger.error(f"Column '{column}' expected type {expected_type}, but got {actual_type}.")
+                        raise
+        return df
+
+    def evaluate_rules(self, df: pd.DataFrame, rule_set: RuleSet) -> tuple[np.ndarray, dict[str, int]]:
+        return rule_set.evaluate(df)
+
+    def combine_masks(self, mask: Optional[np.ndarray], other) -> np.ndarray:
+        other = np.asarray(other, dtype=bool)
+        return other if mask is None else mask & other
+
+    def filter(self, df: pd.DataFrame, mask: np.ndarray) -> pd.DataFrame:
+        return df.loc[mask] if not mask.all() else df
+
+    def to_pandas(self, df: pd.DataFrame, rule_report) -> tuple[pd.DataFrame, dict[str, int]]:
+        return df, rule_report
+
+
+class PolarsEngine(PandasEngine):
+    name = 'polars'
+    # carries the raw row positions through the query to restore the pandas index
+    ROW = '__row'
+
+    def __init__(self, streaming: bool = config['POLARS_STREAMING']):
+        """Build the steps of one cleaner as a lazy Polars query.
+
+        Args:
+            streaming (bool): Execute with Polars' streaming engine, which processes the
+                table in batches and keeps less of it in memory at once.
+        """
+        try:
+            import polars
+        except ImportError:
+            raise ValueError("The polars cleaning engine requires the polars package (pip install polars).")
+        self.pl = polars
+        self.streaming = streaming
+        self.index: Optional[pd.Index] = None
+        self.dtypes: dict[str, object] = {}
+        self.casts: dict[str, str] = {}
+
+    def from_pandas(self, df: pd.DataFrame):
+        pl = self.pl
+        self.index = df.index
+        self.dtypes = df.dtypes.to_dict()
+        # categoricals are compared as strings and restored to their pandas dtype at the end
+        frame = pl.from_pandas(df.reset_index(drop=True)).lazy()
+        categorical = [name for name, dtype in frame.collect_schema().items() if dtype in (pl.Categorical, pl.Enum)]
+        return frame.with_columns(pl.col(categorical).cast(pl.String)).with_row_index(self.ROW)
+
+    def drop_duplicates(self, frame, subset: Optional[list[str]]):
+        subset = subset or [name for name in frame.collect_schema().names() if name != self.ROW]
+        return frame.unique(subset=subset, keep='first', maintain_order=True)
+
+    def rename(self, frame, columns: dict[str, str]):
+        self.dtypes = {columns.get(name, name): dtype for name, dtype in self.dtypes.items()}
+        return frame.rename(columns, strict=False)
+
+    def _polars_type(self, expected_type: str):
+        pl = self.pl
+        types = {'string': pl.String, 'category': pl.String, 'datetime64[ns]': pl.Datetime('ns'),
+                 'int64': pl.Int64, 'Int64': pl.Int64, 'float64': pl.Float64}
+        if expected_type not in types:
+            raise ValueError(f"The polars cleaning engine cannot cast to {expected_type}. "
+                             f"Supported types are: {', '.join(types)}.")
+        return types[expected_type]
+
+    def cast(self, frame, mapping: dict[str, str]):
+        pl = self.pl
+        schema = frame.collect_schema()
+        casts = []
+        for column, expected_type in mapping.items():
+            if column not in schema:
+                continue
+            target = self._polars_type(expected_type)
+            if target == pl.Datetime('ns') and schema[column] == pl.String:
+                casts.append(pl.col(column).str.to_datetime(time_unit='ns'))
+            elif schema[column] != target:
+                casts.append(pl.col(column).cast(target))
+            self.casts[column] = expected_type
+        return frame.with_columns(casts) if casts else frame
+
+    def evaluate_rules(self, frame, rule_set: RuleSet):
+        """The rules as one boolean expression, and the per rule rejected counts as a lazy
+        query over the unfiltered frame, collected together with the result."""
+        pl = self.pl
+        expressions = rule_set.polars_expressions()
+        valid = pl.all_horizontal([expression for _, expression in expressions])
+        rejected = frame.select([(~expression).sum().cast(pl.Int64).alias(name) for name, expression in expressions])
+        return valid, rejected
+
+    def combine_masks(self, mask, other):
+        if isinstance(other, (np.ndarray, pd.Series, list)):
+            raise ValueError("The polars cleaning engine takes Polars expressions as row masks, not arrays.")
+        return other if mask is None else mask & other
+
+    def filter(self, frame, mask):
+        return frame.filter(mask)
+
+    def to_pandas(self, frame, rule_report) -> tuple[pd.DataFrame, dict[str, int]]:
+        """Execute the query and convert the result to the dtypes and index the pandas
+        engine would return."""
+        pl = self.pl
+        engine = 'streaming' if self.streaming else 'auto'
+        if isinstance(rule_report, pl.LazyFrame):
+            result, counts = pl.collect_all([frame, rule_report], engine=engine)
+            rule_report = {name: int(value) for name, value in counts.row(0, named=True).items()}
+        else:
+            result = frame.collect(engine=engine)
+
+        rows = result[self.ROW].to_numpy()
+        # Arrow-backed columns convert without boxing every string into a Python object
+        df = result.drop(self.ROW).to_pandas(use_pyarrow_extension_array=True)
+        df.index = self.index[rows]
+        for column in df.columns:
+            raw_type, expected_type = self.dtypes.get(column), self.casts.get(column)
+            # categories keep the dtype of the raw values, as with pandas' astype('category')
+            if raw_type is not None and expected_type in (None, 'category'):
+                df[column] = df[column].astype(raw_type)
+            if expected_type is not None and df[column].dtype != expected_type:
+                df[column] = df[column].astype(expected_type)
+        return df, rule_report
+
+
+ENGINES: dict[str, type[PandasEngine]] = {
+    PandasEngine.name: PandasEngine,
+    PolarsEngine.name: PolarsEngine,
+}
+
+
+def engine_name(table_name: str, engines_config: dict = None) -> str:
+    """The engine configured for the table in CLEANING_ENGINES, pandas by default."""
+    engines = engines_config if engines_config is not None else config.get('CLEANING_ENGINES') or {}
+    name = engines.get(table_name) or PandasEngine.name
+    if name not in ENGINES:
+        raise ValueError(f"Unknown cleaning engine '{name}' for {table_name}. "
+                         f"Supported engines are: {', '.join(ENGINES)}.")
+    return name
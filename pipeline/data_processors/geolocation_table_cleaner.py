@@ -0,0 +1,129 @@
+# data_processors/geolocation_table_cleaner.py
+"""Cleaner specific for geolocation table."""
+
+from typing import Iterable, Iterator
+
+import pandas as pd
+
+from config.config import config
+from config.log_config import get_logger
+from .base_cleaner import BaseDataCleaner, SeenKeys, data_type_mapping, union_categories
+
+logger = get_logger(__name__)
+
+ZIP = 'geolocation_zip_code_prefix'
+LAT = 'geolocation_lat'
+LNG = 'geolocation_lng'
+CITY = 'geolocation_city'
+STATE = 'geolocation_state'
+
+
+class GeolocationCleaner(BaseDataCleaner):
+    """Geolocation-specific cleaning logic.
+
+    The raw table holds many points per zip code prefix. It is collapsed to one row
+    per prefix: the centroid of its points, and its most frequent city and state.
+    """
+
+    dedup_subset = [ZIP]
+    engines = ('pandas',)
+
+    # Points outside Brazil's bounding box are bad coordinates and would skew the centroids
+    lat_range = (-33.75, 5.27)
+    lng_range = (-73.99, -34.79)
+
+    def __init__(self, raw_data: pd.DataFrame, table_name: str = config['GEOLOCATION_TABLE']):
+        super().__init__(raw_data, table_name)
+
+    def _validate_coordinates(self):
+        """Drop points outside Brazil or without coordinates."""
+        df = self.cleaned_data
+        return self.keep_rows(df[LAT].between(*self.lat_range) & df[LNG].between(*self.lng_range))
+
+    def _partial_aggregates(self) -> tuple[pd.DataFrame, pd.Series]:
+        """Per-prefix coordinate sums and point counts, and per-prefix (city, state) counts.
+
+        Both add up across chunks, so a streamed table aggregates to the same result as
+        the whole table.
+        """
+        df = self.cleaned_data
+        sums = df.groupby(ZIP, sort=False).agg(lat_sum=(LAT, 'sum'), lng_sum=(LNG, 'sum'), points=(LAT, 'size'))
+        places = df.groupby([ZIP, CITY, STATE], sort=False, observed=True).size()
+        return sums, places
+
+    @staticmethod
+    def _collapse(sums: pd.DataFrame, places: pd.Series) -> pd.DataFrame:
+        """One row per zip prefix, sorted by prefix. Ties between places go to the
+        alphabetically first city so results do not depend on the input order."""
+        modal_places = (places.rename('count').reset_index()
+                        .sort_values(['count', CITY, STATE], ascending=[False, True, True])
+                        .drop_duplicates(ZIP)
+                        .set_index(ZIP)[[CITY, STATE]])
+
+        collapsed = pd.DataFrame({
+            LAT: sums['lat_sum'] / sums['points'],
+            LNG: sums['lng_sum'] / sums['points'],
+        }).join(modal_places).sort_index()
+
+        collapsed.index.name = ZIP
+        return collapsed.reset_index()
+
+    def _prepare(self):
+        self.cleaned_data = self.raw_data.drop_duplicates(keep='first')
+
+        (self
+            .data_type_validation(data_type_mapping.get(self.table_name))
+            ._validate_coordinates()
+            .apply_rules()
+            ._drop_seen_points()
+            .apply_row_filter())
+
+        return self
+
+    def _drop_seen_points(self):
+        """Drop points already seen in an earlier chunk. Whole rows are the key here,
+        dedup_subset describes the collapsed output. No-op outside streaming mode."""
+        if self.seen_keys is None:
+            return self
+        return self.keep_rows(self.seen_keys.filter_new(self.cleaned_data))
+
+    @classmethod
+    def clean_stream(cls, chunks: Iterable[pd.DataFrame], table_name: str) -> Iterator[pd.DataFrame]:
+        """Aggregate all chunks, then yield the collapsed table as a single chunk.
+
+        Besides 8 bytes per distinct point for deduplication, memory follows the number
+        of distinct zip prefixes, not the number of points.
+        """
+        seen_keys = SeenKeys()
+        sums, places = None, None
+        for chunk in chunks:
+            cleaner = cls(raw_data=chunk, table_name=table_name)
+            cleaner.seen_keys = seen_keys
+            chunk_sums, chunk_places = cleaner._prepare()._partial_aggregates()
+            sums = chunk_sums if sums is None else sums.add(chunk_sums, fill_value=0)
+            places = chunk_places if places is None else places.add(chunk_places, fill_value=0)
+
+        if sums is not None:
+            yield cls._collapse(sums, places).astype(data_type_mapping.get(table_name))
+
+    def merge_shards(self, cleaned_shards: list[pd.DataFrame]) -> pd.DataFrame:
+        """Shards are split by zip code prefix, so each holds the complete collapsed rows
+        of its prefixes; they only need to be put back in prefix order."""
+        merged = pd.concat(union_categories(cleaned_shards))
+        return merged.sort_values(ZIP, kind='stable').reset_index(drop=True)
+
+    def clean(self) -> pd.DataFrame:
+        """Main cleaning pipeline for geolocation table."""
+        logger.info("Starting geolocation cleaning process")
+
+        try:
+            self.cleaned_data = self._collapse(*self._prepare()._partial_aggregates())
+            self.data_type_validation(data_type_mapping.get(self.table_name))
+
+            logger.info(f"Geolocation collapsed from {len(self.raw_data)} points "
+                        f"to {len(self.cleaned_data)} zip code prefixes")
+            return self.cleaned_data
+
+        except Exception as e:
+            logger.error(f"Error during geolocation cleaning: {str(e)}")
+            raise
@@ -0,0 +1,211 @@
+# data_processors/rules.py
+"""Declarative row rules from CLEANING_RULES, compiled into one fused mask per table.
+
+    CLEANING_RULES:
+      ORDERS:
+        dedup_keys: ["order_id"]
+        rules:
+          - name: "delivered_orders_have_dates"
+            type: "not_null_if"
+            when: {order_status: ["delivered"]}
+            columns: ["order_approved_at", "order_delivered_carrier_date"]
+          - name: "timestamps_in_order"
+            type: "ordering"
+            columns: ["order_purchase_timestamp", "order_approved_at"]
+          - name: "price_not_negative"
+            type: "range"
+            column: "price"
+            min: 0
+
+Rule types:
+    not_null:    every listed column is filled.
+    not_null_if: every listed column is filled on rows matching all `when` conditions.
+    ordering:    consecutive listed columns are non-decreasing wherever both are filled.
+    range:       `column` lies within [min, max] (either bound optional) wherever filled.
+
+Each type compiles to a NumPy mask for the pandas cleaning engine and to a Polars
+expression with the same semantics for the polars engine (see engines.py).
+"""
+
+from typing import Callable, NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from config.config import config
+from config.log_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class _Columns:
+    """Converts each column a rule set touches to a NumPy array once per frame."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._values = {}
+        self._filled = {}
+
+    def values(self, column: str) -> np.ndarray:
+        if column not in self._values:
+            series = self.df[column]
+            if pd.api.types.is_datetime64_any_dtype(series.dtype):
+                values = series.to_numpy(dtype='datetime64[ns]')
+            elif pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype):
+                values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                values = series.to_numpy(dtype=object)
+            self._values[column] = values
+        return self._values[column]
+
+    def filled(self, column: str) -> np.ndarray:
+        if column not in self._filled:
+            self._filled[column] = self.df[column].notna().to_numpy()
+        return self._filled[column]
+
+    def matches(self, column: str, accepted: list) -> np.ndarray:
+        return self.df[column].isin(accepted).to_numpy()
+
+
+class CompiledRule(NamedTuple):
+    name: str
+    passes: Callable[[_Columns], np.ndarray]
+
+
+def _not_null(spec: dict) -> Callable[[_Columns], np.ndarray]:
+    columns = spec['columns']
+
+    def passes(data: _Columns) -> np.ndarray:
+        return np.logical_and.reduce([data.filled(column) for column in columns])
+    return passes
+
+
+def _not_null_if(spec: dict) -> Callable[[_Columns], np.ndarray]:
+    columns, when = spec['columns'], spec['when']
+
+    def passes(data: _Columns) -> np.ndarray:
+        applies = np.logical_and.reduce([data.matches(column, accepted) for column, accepted in when.items()])
+        all_filled = np.logical_and.reduce([data.filled(column) for column in columns])
+        return ~applies | all_filled
+    return passes
+
+
+def _ordering(spec: dict) -> Callable[[_Columns], np.ndarray]:
+    columns = spec['columns']
+    if len(columns) < 2:
+        raise ValueError(f"Ordering rule '{spec['name']}' needs at least two columns.")
+
+    def passes(data: _Columns) -> np.ndarray:
+        valid = None
+        for earlier, later in zip(columns, columns[1:]):
+            both_filled = data.filled(earlier) & data.filled(later)
+            ordered = ~both_filled | (data.values(earlier) <= data.values(later))
+            valid = ordered if valid is None else valid & ordered
+        return valid
+    return passes
+
+
+def _range(spec: dict) -> Callable[[_Columns], np.ndarray]:
+    column, low, high = spec['column'], spec.get('min'), spec.get('max')
+    if low is None and high is None:
+        raise ValueError(f"Range rule '{spec['name']}' needs a min, a max or both.")
+
+    def passes(data: _Columns) -> np.ndarray:
+        values = data.values(column)
+        within = np.ones(len(values), dtype=bool)
+        with np.errstate(invalid='ignore'):
+            if low is not None:
+                within &= values >= low
+            if high is not None:
+                within &= values <= high
+        return ~data.filled(column) | within
+    return passes
+
+
+RULE_TYPES: dict[str, Callable[[dict], Callable[[_Columns], np.ndarray]]] = {
+    'not_null': _not_null,
+    'not_null_if': _not_null_if,
+    'ordering': _ordering,
+    'range': _range,
+}
+
+
+def _polars_not_null(pl, spec: dict):
+    return pl.all_horizontal([pl.col(column).is_not_null() for column in spec['columns']])
+
+
+def _polars_not_null_if(pl, spec: dict):
+    applies = pl.all_horizontal([pl.col(column).is_in(accepted).fill_null(False)
+                                 for column, accepted in spec['when'].items()])
+    return ~applies | _polars_not_null(pl, spec)
+
+
+def _polars_ordering(pl, spec: dict):
+    columns = spec['columns']
+    return pl.all_horizontal([
+        ~(pl.col(earlier).is_not_null() & pl.col(later).is_not_null()) | (pl.col(earlier) <= pl.col(later))
+        for earlier, later in zip(columns, columns[1:])])
+
+
+def _polars_range(pl, spec: dict):
+    value, low, high = pl.col(spec['column']), spec.get('min'), spec.get('max')
+    within = pl.lit(True)
+    if low is not None:
+        within &= value >= low
+    if high is not None:
+        within &= value <= high
+    return value.is_null() | within
+
+
+# Same rule types as RULE_TYPES, as Polars expressions; builders receive the polars module
+POLARS_RULE_TYPES: dict[str, Callable] = {
+    'not_null': _polars_not_null,
+    'not_null_if': _polars_not_null_if,
+    'ordering': _polars_ordering,
+    'range': _polars_range,
+}
+
+
+class RuleSet:
+    """The compiled rules of one table."""
+
+    def __init__(self, table_name: str, specs: list[dict] = None, dedup_keys: list[str] = None):
+        self.table_name = table_name
+        self.dedup_keys = dedup_keys
+        self.specs = list(specs or [])
+        self.rules = []
+        for spec in self.specs:
+            if spec.get('type') not in RULE_TYPES:
+                raise ValueError(f"Unknown rule type '{spec.get('type')}' in {table_name} rule "
+                                 f"'{spec.get('name')}'. Supported types are: {', '.join(RULE_TYPES)}.")
+            self.rules.append(CompiledRule(spec['name'], RULE_TYPES[spec['type']](spec)))
+
+    @classmethod
+    def for_table(cls, table_name: str, rules_config: dict = None) -> "RuleSet":
+        """Compile the rules declared for the table in CLEANING_RULES."""
+        table_rules = (rules_config if rules_config is not None else config.get('CLEANING_RULES') or {}).get(table_name) or {}
+        return cls(table_name, table_rules.get('rules'), table_rules.get('dedup_keys'))
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def evaluate(self, df: pd.DataFrame) -> tuple[np.ndarray, dict[str, int]]:
+        """Evaluate every rule over df in one pass.
+
+        Returns the mask of rows passing all rules, and per rule the number of rows it
+        rejects (a row breaking two rules is counted by both).
+        """
+        data = _Columns(df)
+        valid = np.ones(len(df), dtype=bool)
+        rejected = {}
+        for rule in self.rules:
+            passes = rule.passes(data)
+            rejected[rule.name] = int(len(passes) - np.count_nonzero(passes))
+            valid &= passes
+        return valid, rejected
+
+    def polars_expressions(self) -> list[tuple[str, object]]:
+        """Every rule as a (name, Polars boolean expression) pair, true for passing rows."""
+        import polars as pl
+
+        return [(spec['name'], POLARS_RULE_TYPES[spec['type']](pl, spec)) for spec in self.specs]
@@ -0,0 +1,143 @@
+"""Columnar file sink: compressed Parquet or Feather datasets, optionally Hive-partitioned."""
+
+import os
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from config.config import config
+from config.log_config import get_logger
+from pipeline.compaction import restore_dtypes
+from pipeline.metrics import NO_METRICS, RunMetrics
+
+logger = get_logger(__name__)
+
+_PERIOD_LABELS = {'Y': 'year', 'M': 'month', 'D': 'day'}
+
+
+def partition_column(spec: dict) -> str:
+    """Name of the derived partition column, e.g. 'order_purchase_timestamp_month'."""
+    return f"{spec['column']}_{_PERIOD_LABELS[spec['freq']]}"
+
+
+class ColumnarFileSink:
+    def __init__(self, directory: str, *, file_format: str = 'parquet',
+                 compression: str = config['FILE_SINK_COMPRESSION'],
+                 row_group_size: int = config['FILE_SINK_ROW_GROUP_SIZE'],
+                 partitions: dict = config['FILE_SINK_PARTITIONS'],
+                 workers: int = config['FILE_SINK_WORKERS'], metrics: RunMetrics = NO_METRICS):
+        """Initialize the sink.
+
+        Args:
+            directory (str): Every table is written to '<directory>/<table_name>/'.
+            file_format (str): 'parquet' or 'feather' (Arrow IPC).
+            compression (str): Codec, e.g. 'zstd', 'snappy' or 'lz4' (feather supports 'zstd' and 'lz4').
+            row_group_size (int): Maximum rows per Parquet row group / Feather record batch.
+            partitions (dict): Per-table Hive partitioning by a datetime column's period,
+                for example {'ORDERS': {'column': 'order_purchase_timestamp', 'freq': 'M'}}.
+            workers (int): Number of tables written concurrently.
+            metrics (RunMetrics): Collects the time and rows of every table written by write().
+        """
+        if file_format not in ['parquet', 'feather']:
+            raise ValueError("Unsupported file format. Supported formats are: 'parquet', 'feather'.")
+
+        self.directory = directory
+        self.file_format = file_format
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self.partitions = partitions or {}
+        self.workers = workers
+        self.metrics = metrics
+
+    def _format(self):
+        import pyarrow.dataset as ds
+
+        if self.file_format == 'parquet':
+            file_format = ds.ParquetFileFormat()
+        else:
+            file_format = ds.IpcFileFormat()
+        return file_format, file_format.make_write_options(compression=self.compression)
+
+    @staticmethod
+    def _publish(final_dir: str, version_dir: str) -> list[str]:
+        """Point final_dir at version_dir; returns the directories of replaced versions.
+
+        final_dir is a symbolic link replaced with a single rename, which is atomic, so
+        readers opening the table see either the previous or the new version in full.
+        A real directory left by an older sink is first moved aside, the only time
+        final_dir briefly does not exist.
+        """
+        replaced = []
+        if os.path.islink(final_dir):
+            replaced.append(os.path.realpath(final_dir))
+        elif os.path.exists(final_dir):
+            replaced.append(f"{version_dir}.old")
+            os.replace(final_dir, replaced[-1])
+
+        link = f"{version_dir}.link"
+        os.symlink(os.path.basename(version_dir), link, target_is_directory=True)
+        os.replace(link, final_dir)
+        return replaced
+
+    def write_table(self, table_name: str, df: pd.DataFrame) -> str:
+        """Write one table to a new version directory, then publish it, see _publish.
+
+        Versions are hidden directories next to the link ('.<table_name>.<id>'), which
+        dataset readers skip; the replaced version is deleted once the new one is
+        published. Files already opened in it stay readable on POSIX systems.
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        # the written schema must not depend on the value ranges compaction saw this run
+        df = restore_dtypes(df)
+        partitioning = None
+        spec = self.partitions.get(table_name)
+        if spec:
+            column = partition_column(spec)
+            df = df.assign(**{column: pd.to_datetime(df[spec['column']]).dt.to_period(spec['freq']).astype('string')})
+            partitioning = ds.partitioning(pa.schema([(column, pa.string())]), flavor='hive')
+
+        final_dir = os.path.join(self.directory, table_name)
+        version_dir = os.path.join(self.directory, f".{table_name}.{uuid.uuid4().hex}")
+        file_format, file_options = self._format()
+
+        os.makedirs(version_dir)
+        try:
+            ds.write_dataset(
+                pa.Table.from_pandas(df, preserve_index=False),
+                version_dir,
+                format=file_format,
+                file_options=file_options,
+                partitioning=partitioning,
+                basename_template=f"part-{{i}}.{self.file_format}",
+                max_rows_per_group=self.row_group_size,
+                min_rows_per_group=min(self.row_group_size, max(len(df), 1)),
+                existing_data_behavior='overwrite_or_ignore'
+            )
+
+            replaced = self._publish(final_dir, version_dir)
+        except Exception:
+            shutil.rmtree(version_dir, ignore_errors=True)
+            raise
+        for old_dir in replaced:
+            shutil.rmtree(old_dir, ignore_errors=True)
+
+        logger.info(f"Data saved to {final_dir} as {self.file_format}"
+                    f"{f' partitioned by {partition_column(spec)}' if spec else ''}.")
+        return final_dir
+
+    def _timed_write_table(self, table_name: str, df: pd.DataFrame) -> str:
+        with self.metrics.stage('load', table_name, rows_in=len(df)) as record:
+            final_dir = self.write_table(table_name, df)
+            record.rows_out = len(df)
+        return final_dir
+
+    def write(self, tables: dict[str, pd.DataFrame]) -> dict[str, str]:
+        """Write all tables concurrently. Returns the directory of each table."""
+        os.makedirs(self.directory, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(tables)))) as executor:
+            futures = {name: executor.submit(self._timed_write_table, name, df) for name, df in tables.items()}
+            return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,225 @@
+"""Persisted state for incremental runs: raw file fingerprints and per-table high-water marks."""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import config
+from config.log_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def file_sha256(path: str, size: Optional[int] = None) -> str:
+    """SHA-256 of a file, or of its first size bytes."""
+    digest = hashlib.sha256()
+    remaining = size if size is not None else float('inf')
+    with open(path, 'rb') as file:
+        while remaining > 0 and (block := file.read(int(min(1 << 20, remaining)))):
+            digest.update(block)
+            remaining -= len(block)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path: str, *, with_hash: bool = True) -> dict:
+    """Size, modification time and (optionally) SHA-256 of a file."""
+    stat = os.stat(path)
+    fingerprint = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    if with_hash:
+        fingerprint['sha256'] = file_sha256(path)
+    return fingerprint
+
+
+class IncrementalState:
+    """State store of the last successful run, kept as a JSON file, plus the keys of the
+    rows loaded into tables that foreign keys reference, one Parquet file per table.
+
+        {
+            'ORDERS': {
+                'fingerprint': {'size': ..., 'mtime_ns': ..., 'sha256': ...},
+                'rows': 99441,
+                'watermark': '2018-10-17T17:30:18',
+                'watermark_keys': ['a1b2...'],  # keys of the rows at the watermark
+                'undated_keys': ['c3d4...']     # keys of the loaded rows without a valid watermark
+            },
+        }
+    """
+
+    def __init__(self, path: str = config['INCREMENTAL_STATE_FILE'], keys_dir: str = config['INCREMENTAL_KEYS_DIR']):
+        self.path = path
+        self.keys_dir = keys_dir
+        self.tables = {}
+        self._added_keys: dict[str, pd.DataFrame] = {}
+        if os.path.exists(path):
+            with open(path, 'r') as file:
+                self.tables = json.load(file)
+
+    def changed_fingerprint(self, table_name: str, path: str) -> Optional[dict]:
+        """Return the file's new fingerprint, or None when it is unchanged since the last run.
+
+        Size and mtime are checked first; the file is only hashed when they differ, so an
+        untouched file costs one stat call. A rewritten file with identical content is
+        treated as unchanged.
+        """
+        previous = self.tables.get(table_name, {}).get('fingerprint')
+        current = file_fingerprint(path, with_hash=False)
+        if previous and all(previous[key] == current[key] for key in ('size', 'mtime_ns')):
+            return None
+
+        current = file_fingerprint(path)
+        if previous and previous.get('sha256') == current['sha256']:
+            # content is the same, remember the new mtime so the next run skips hashing
+            self.tables[table_name]['fingerprint'] = current
+            return None
+        return current
+
+    def processed_rows(self, table_name: str, path: str) -> Optional[int]:
+        """Leading rows of the file that earlier runs processed, or None when the file was
+        rewritten since the last run.
+
+        A file counts as appended to when the content fingerprinted by the last run is an
+        unchanged prefix of it; its first 'rows' rows were processed then. A table never
+        processed before has 0 processed rows.
+        """
+        entry = self.tables.get(table_name)
+        if not entry:
+            return 0
+        previous = entry.get('fingerprint', {})
+        if 'rows' not in entry or 'sha256' not in previous or os.path.getsize(path) < previous['size']:
+            return None
+        return entry['rows'] if file_sha256(path, previous['size']) == previous['sha256'] else None
+
+    def watermark(self, table_name: str) -> Optional[pd.Timestamp]:
+        value = self.tables.get(table_name, {}).get('watermark')
+        return pd.Timestamp(value) if value else None
+
+    def watermark_keys(self, table_name: str) -> frozenset:
+        return frozenset(self.tables.get(table_name, {}).get('watermark_keys', []))
+
+    def undated_keys(self, table_name: str) -> frozenset:
+        return frozenset(self.tables.get(table_name, {}).get('undated_keys', []))
+
+    def update(self, table_name: str, fingerprint: dict, rows: int, watermark: Optional[pd.Timestamp] = None,
+               watermark_keys: Optional[list[str]] = None, undated_keys: Optional[list[str]] = None):
+        entry = self.tables.setdefault(table_name, {})
+        entry['fingerprint'] = fingerprint
+        entry['rows'] = rows
+        if watermark is not None and not pd.isna(watermark):
+            entry['watermark'] = watermark.isoformat()
+            entry['watermark_keys'] = watermark_keys or []
+        if undated_keys:
+            # unlike the keys at the watermark these never age out, so they accumulate
+            entry['undated_keys'] = sorted(self.undated_keys(table_name).union(undated_keys))
+
+    def _keys_path(self, table_name: str) -> str:
+        return os.path.join(self.keys_dir, f"{table_name}.parquet")
+
+    def loaded_keys(self, table_name: str) -> Optional[pd.DataFrame]:
+        """Key columns of the rows loaded into the table so far, None when none are stored."""
+        if table_name in self._added_keys:
+            return self._added_keys[table_name]
+        path = self._keys_path(table_name)
+        return pd.read_parquet(path) if os.path.exists(path) else None
+
+    def add_loaded_keys(self, table_name: str, keys: pd.DataFrame):
+        """Remember the keys of rows loaded by this run; written by save()."""
+        previous = self.loaded_keys(table_name)
+        combined = keys if previous is None else pd.concat([previous, keys], ignore_index=True)
+        self._added_keys[table_name] = combined.drop_duplicates(ignore_index=True)
+
+    def save(self):
+        """Write the state atomically so an interrupted run never leaves it half written.
+
+        Key files are written first: keys of rows the saved state does not cover yet
+        only make the next run's foreign key check more lenient for rows it reloads.
+        """
+        for table_name, keys in self._added_keys.items():
+            _replace_file(self._keys_path(table_name), 'wb', lambda file: keys.to_parquet(file, index=False))
+        _replace_file(self.path, 'w', lambda file: json.dump(self.tables, file, indent=2, sort_keys=True))
+
+
+def _replace_file(path: str, mode: str, write):
+    """Write a file through a uniquely named temporary file next to it, then move it into
+    place, so concurrent writers never share a temporary file and readers never see half of one."""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(mode, dir=directory, prefix=f".{os.path.basename(path)}.",
+                                     suffix='.tmp', delete=False) as file:
+        try:
+            write(file)
+        except BaseException:
+            file.close()
+            os.remove(file.name)
+            raise
+    os.replace(file.name, path)
+
+
+def watermark_values(df: pd.DataFrame, column: str) -> pd.Series:
+    return df[column] if pd.api.types.is_datetime64_any_dtype(df[column]) \
+        else pd.to_datetime(df[column], errors='coerce')
+
+
+def row_keys(df: pd.DataFrame, columns: list[str]) -> pd.Series:
+    """The key columns of every row as one string, comparable with keys kept in the state."""
+    keys = df[columns[0]].astype(str)
+    for column in columns[1:]:
+        keys = keys + '\x1f' + df[column].astype(str)
+    return keys
+
+
+def split_at_watermark(df: pd.DataFrame, column: str, watermark: Optional[pd.Timestamp],
+                       key_columns: Optional[list[str]] = None, seen_keys: frozenset = frozenset(),
+                       undated_keys: frozenset = frozenset()) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Split df into the rows processed by earlier runs and the new rows.
+
+    New rows are newer than the stored high-water mark, or exactly at it with a key that
+    earlier runs did not see: rows arriving late with the timestamp of the last loaded row.
+    Rows whose watermark column is empty or unparseable cannot be placed against the
+    watermark, so they are new unless their key is among the undated_keys already loaded.
+
+    Args:
+        key_columns (list[str], optional): Columns identifying a row, all columns by default.
+        seen_keys (frozenset): row_keys of the rows at the watermark that were processed.
+        undated_keys (frozenset): row_keys of the rows without a watermark that were processed.
+    """
+    values = watermark_values(df, column)
+    if watermark is None:
+        newer = np.ones(len(df), dtype=bool)
+    else:
+        newer = (values > watermark).to_numpy(copy=True)
+        at_watermark = (values == watermark).to_numpy()
+        if at_watermark.any():
+            keys = row_keys(df.loc[at_watermark], key_columns or list(df.columns))
+            newer[at_watermark] = ~keys.isin(seen_keys).to_numpy()
+
+    undated = values.isna().to_numpy()
+    if undated.any():
+        keys = row_keys(df.loc[undated], key_columns or list(df.columns))
+        newer[undated] = ~keys.isin(undated_keys).to_numpy()
+        if newer[undated].any():
+            logger.warning(f"{int(newer[undated].sum())} new rows have no valid {column}, "
+                           f"they are loaded but do not move the watermark")
+    return df.loc[~newer], df.loc[newer]
+
+
+def max_watermark(df: pd.DataFrame, column: str) -> Optional[pd.Timestamp]:
+    value = watermark_values(df, column).max() if not df.empty else None
+    return None if pd.isna(value) else value
+
+
+def keys_at_watermark(df: pd.DataFrame, column: str, watermark: pd.Timestamp,
+                      key_columns: Optional[list[str]] = None) -> list[str]:
+    """row_keys of the rows at the watermark, kept so the next run can tell late rows apart."""
+    at_watermark = (watermark_values(df, column) == watermark).to_numpy()
+    return sorted(row_keys(df.loc[at_watermark], key_columns or list(df.columns)).unique())
+
+
+def keys_without_watermark(df: pd.DataFrame, column: str, key_columns: Optional[list[str]] = None) -> list[str]:
+    """row_keys of the rows whose watermark column is empty or unparseable."""
+    undated = watermark_values(df, column).isna().to_numpy()
+    return sorted(row_keys(df.loc[undated], key_columns or list(df.columns)).unique())
@@ -0,0 +1,112 @@
+"""Cross-table referential integrity checks on cleaned tables, with quarantine of orphan rows."""
+
+import os
+from datetime import datetime
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from config.config import config
+from config.log_config import get_logger
+from pipeline.schema import ForeignKey, foreign_keys, topological_order
+
+logger = get_logger(__name__)
+
+
+def orphan_mask(child: pd.DataFrame, columns: list[str], parent: pd.DataFrame, parent_columns: list[str]) -> np.ndarray:
+    """Boolean mask of the child rows whose key is missing from the parent.
+
+    Rows with a NULL in any key column reference nothing and are never orphans, as in SQL.
+    """
+    present = child[columns].notna().all(axis=1).to_numpy()
+    if len(columns) == 1:
+        found = child[columns[0]].isin(parent[parent_columns[0]].dropna().unique()).to_numpy()
+    else:
+        # composite keys: hashed tuple membership, tolerant of differing numeric dtypes
+        found = pd.MultiIndex.from_frame(child[columns]).isin(pd.MultiIndex.from_frame(parent[parent_columns]))
+    return present & ~found
+
+
+class ReferentialIntegrityValidator:
+    def __init__(self, *, schema_path: str = config['STAGE_SCHEMA_PATH'],
+                 quarantine_dir: Optional[str] = config['QUARANTINE_DIR']):
+        """Initialize the validator.
+
+        Args:
+            schema_path (str): SQL schema whose FOREIGN KEY declarations are checked.
+            quarantine_dir (str, optional): Orphan rows are written to
+                '<quarantine_dir>/<run timestamp>/<table>.csv'. None only drops them.
+        """
+        self.schema_path = schema_path
+        self.quarantine_dir = quarantine_dir
+        self.report: dict[str, dict[str, int]] = {}
+
+    @staticmethod
+    def _describe(key: ForeignKey) -> str:
+        return f"({', '.join(key.columns)}) -> {key.parent}({', '.join(key.parent_columns)})"
+
+    def validate(self, tables: dict[str, pd.DataFrame],
+                 loaded: Optional[dict[str, pd.DataFrame]] = None) -> dict[str, pd.DataFrame]:
+        """Drop the rows of `tables` that violate a foreign key, quarantining them.
+
+        Tables are checked parents first, so the children of rejected rows are rejected
+        too (an order without a customer also orphans its items). Foreign keys to a
+        table that is neither part of `tables` nor of `loaded` are not checked: the
+        parent is assumed to be loaded already. Returns the tables in their original order; the counts of
+        rejected rows per table and foreign key are kept in `report`.
+
+        Args:
+            tables (dict): Cleaned tables of this run, {table_name: DataFrame}.
+            loaded (dict, optional): Per parent table, the key columns of the rows that
+                earlier runs loaded, such as the keys an incremental run keeps in its
+                state. Child keys found there are not orphans.
+        """
+        declared = foreign_keys(self.schema_path)
+        by_lower = {name.lower(): name for name in tables}
+        loaded = {name.lower(): df for name, df in (loaded or {}).items()}
+        valid = dict(tables)
+        quarantined = {}
+        self.report = {}
+
+        for table_name in topological_order(list(tables), self.schema_path):
+            df = valid[table_name]
+            rejected = np.zeros(len(df), dtype=bool)
+            reasons = np.full(len(df), None, dtype=object)
+
+            for key in declared.get(table_name.lower(), []):
+                parent_name = by_lower.get(key.parent)
+                if parent_name is None and key.parent not in loaded:
+                    logger.debug(f"{table_name}: parent {key.parent} is not in this run, skipping {self._describe(key)}")
+                    continue
+
+                parents = [valid[parent_name][key.parent_columns]] if parent_name is not None else []
+                if key.parent in loaded:
+                    parents.append(loaded[key.parent][key.parent_columns])
+                parent = parents[0] if len(parents) == 1 else pd.concat(parents, ignore_index=True)
+                orphans = orphan_mask(df, key.columns, parent, key.parent_columns)
+                new_orphans = orphans & ~rejected
+                reasons[new_orphans] = self._describe(key)
+                rejected |= orphans
+                self.report.setdefault(table_name, {})[self._describe(key)] = int(orphans.sum())
+
+            if rejected.any():
+                quarantined[table_name] = df.loc[rejected].assign(_violated_foreign_key=reasons[rejected])
+                valid[table_name] = df.loc[~rejected]
+                logger.warning(f"{table_name}: {rejected.sum()} of {len(df)} rows violate foreign keys "
+                               f"{self.report[table_name]}")
+
+        if quarantined:
+            self._quarantine(quarantined)
+        logger.info(f"Referential integrity checked for {len(tables)} tables, "
+                    f"{sum(len(df) for df in quarantined.values())} rows quarantined.")
+        return valid
+
+    def _quarantine(self, quarantined: dict[str, pd.DataFrame]):
+        if self.quarantine_dir is None:
+            return
+        directory = os.path.join(self.quarantine_dir, datetime.now().strftime('%Y%m%dT%H%M%S'))
+        os.makedirs(directory, exist_ok=True)
+        for table_name, df in quarantined.items():
+            df.to_csv(os.path.join(directory, f"{table_name}.csv"), index=False)
+        logger.info(f"Quarantined rows written to {directory}")
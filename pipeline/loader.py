@@ -1,9 +1,18 @@
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable
+
 import pandas as pd
-from dotenv import load_dotenv
 
-from config.config import config
+from config.config import config, load_env
 from config.log_config import get_logger
 from pipeline.base_db_connection import BaseDBConnection
+from pipeline.compaction import restore_dtypes
+from pipeline.file_sink import ColumnarFileSink
+from pipeline.metrics import NO_METRICS, RunMetrics
+from pipeline.schema import merge_keys, primary_keys, table_dependencies
+from pipeline.snowflake_stage import SnowflakeStage, staged_load
 
 logger = get_logger(__name__)
 
@@ -16,26 +25,251 @@ logger = get_logger(__name__)
 
 
 class DataLoader(BaseDBConnection):
-    def __init__(self, source: str, *, dataframe_table_mapping: dict, schema: str):
+    def __init__(self, source: str, *, dataframe_table_mapping: dict | Iterable[tuple[str, pd.DataFrame]], schema: str,
+                 postgres_load_method: str = config['POSTGRES_LOAD_METHOD'],
+                 snowflake_load_method: str = config['SNOWFLAKE_LOAD_METHOD'],
+                 load_mode: str = config['LOAD_MODE'],
+                 workers: int = config['LOAD_WORKERS'], metrics: RunMetrics = NO_METRICS, connector=None,
+                 append_files: bool = False):
         """Initialize the DataLoader with configuration and source.
         **Make sure you have created the schema in the target database before loading data.**
 
         Args:
-            source (str): The source of the data, e.g., 'postgres', 'snowflake'.
+            source (str): The source of the data, e.g., 'postgres', 'snowflake', 'CSV',
+                or the columnar file sinks 'parquet' and 'feather'.
             dataframe (pd.DataFrame | list): The DataFrame or list of DataFrames containing the data to be loaded.
             dataframe_table_mapping (dict): A mapping of DataFrame names to target table.
                 the keys are the dataframe and the values are the table names.
                     {table_name: dataframe}
+                For load_stream it may also be an iterable of (table_name, chunk) pairs.
+            postgres_load_method (str, optional): 'copy' streams rows with COPY FROM STDIN,
+                'to_sql' uses batched INSERTs.
+            snowflake_load_method (str, optional): 'stage' uploads Parquet files to a stage and
+                runs COPY INTO for tables of at least SNOWFLAKE_STAGE_MIN_ROWS rows, 'to_sql'
+                inserts through the SQLAlchemy dialect.
+            load_mode (str, optional): 'append' adds rows to the target tables, 'merge' upserts
+                them on the primary keys declared in STAGE_SCHEMA_PATH, into the tables created
+                from that schema. Tables without a primary key are merged on their
+                MERGE_NATURAL_KEYS; tables with neither are appended.
+            workers (int, optional): Maximum number of tables loaded concurrently into a database.
+                Tables referenced by foreign keys in STAGE_SCHEMA_PATH always finish loading
+                before the tables that reference them start.
+            metrics (RunMetrics, optional): Collects the time and rows of every table loaded.
+            connector (Engine, optional): An engine to load through instead of creating one,
+                e.g. kept warm across runs by a daemon. It is left open for its owner.
+            append_files (bool, optional): CSV only: append to existing files, without a
+                header, instead of replacing them. Incremental runs load only new rows.
         """
 
-        load_dotenv()
+        load_env()
 
-        if source not in ['postgres', 'snowflake', 'CSV']:
-            raise ValueError("Unsupported source type. Supported types are: 'postgres', 'snowflake', 'CSV'.")
+        if source not in ['postgres', 'snowflake', 'CSV', 'parquet', 'feather']:
+            raise ValueError("Unsupported source type. Supported types are: "
+                             "'postgres', 'snowflake', 'CSV', 'parquet', 'feather'.")
         self.source = source
         self.dataframe_table_mapping = dataframe_table_mapping
         self.schema = schema
-        self.connector = None
+
+        if postgres_load_method not in ['copy', 'to_sql']:
+            raise ValueError("Unsupported PostgreSQL load method. Supported methods are: 'copy', 'to_sql'.")
+        self.postgres_load_method = postgres_load_method
+
+        if snowflake_load_method not in ['stage', 'to_sql']:
+            raise ValueError("Unsupported Snowflake load method. Supported methods are: 'stage', 'to_sql'.")
+        self.snowflake_load_method = snowflake_load_method
+
+        if load_mode not in ['append', 'merge']:
+            raise ValueError("Unsupported load mode. Supported modes are: 'append', 'merge'.")
+        self.load_mode = load_mode
+        self.workers = workers
+        self.metrics = metrics
+        self.connector = connector
+        self._owns_connector = connector is None
+        self.append_files = append_files
+
+    def _close_connection(self):
+        if self._owns_connector:
+            super()._close_connection()
+
+    def _to_sql(self, table_name: str, df: pd.DataFrame):
+        """Append a DataFrame to a database table."""
+        df.to_sql(
+            table_name,
+            con=self.connector,
+            schema=self.schema,
+            if_exists='append',
+            index=False,
+            chunksize=config['CHUNK_SIZE']
+        )
+
+    def _quoted_table_name(self, table_name: str) -> str:
+        """Schema-qualified table name quoted the way to_sql would create it."""
+        preparer = self.connector.dialect.identifier_preparer
+        if self.schema:
+            return f"{preparer.quote_schema(self.schema)}.{preparer.quote(table_name)}"
+        return preparer.quote(table_name)
+
+    def _create_table(self, table_name: str, df: pd.DataFrame):
+        """Create the target table when it is missing, exactly like the to_sql path."""
+        df.head(0).to_sql(table_name, con=self.connector, schema=self.schema, if_exists='append', index=False)
+
+    def _quoted_columns(self, columns) -> list[str]:
+        preparer = self.connector.dialect.identifier_preparer
+        return [preparer.quote(str(column)) for column in columns]
+
+    def _copy_dataframe(self, cursor, target: str, df: pd.DataFrame):
+        """COPY a DataFrame into `target` on a psycopg2 cursor, CHUNK_SIZE rows per CSV buffer."""
+        copy_sql = (f"COPY {target} ({', '.join(self._quoted_columns(df.columns))}) "
+                    f"FROM STDIN WITH (FORMAT csv, NULL '\\N')")
+        for start in range(0, len(df), config['CHUNK_SIZE']):
+            buffer = io.StringIO()
+            df.iloc[start:start + config['CHUNK_SIZE']].to_csv(buffer, index=False, header=False, na_rep='\\N')
+            buffer.seek(0)
+            cursor.copy_expert(copy_sql, buffer)
+
+    def _merge_keys(self, table_name: str) -> list[str] | None:
+        """Key columns to merge on, or None when the table should be appended."""
+        if self.load_mode != 'merge':
+            return None
+        keys = merge_keys().get(table_name.lower())
+        if keys is None:
+            logger.warning(f"{table_name} declares no primary key in the schema and has no MERGE_NATURAL_KEYS, "
+                           f"appending instead of merging.")
+        return keys
+
+    @staticmethod
+    def _drop_duplicate_keys(table_name: str, df: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+        """Keep the last row of every primary key, as a merge cannot update a row twice.
+
+        Cleaners may deduplicate on whole rows, so rows differing outside the key can
+        reach the loader; in a sequence of upserts the last one wins.
+        """
+        duplicated = df.duplicated(subset=keys, keep='last')
+        if not duplicated.any():
+            return df
+        logger.warning(f"{table_name}: dropping {int(duplicated.sum())} earlier rows of duplicate "
+                       f"primary keys ({', '.join(keys)}) before merging.")
+        return df.loc[~duplicated]
+
+    def _postgres_merge(self, table_name: str, df: pd.DataFrame, keys: list[str]):
+        """Upsert a DataFrame: COPY it into a temporary table, then run one
+        INSERT ... ON CONFLICT DO UPDATE against the schema-declared table.
+
+        ON CONFLICT needs the primary key constraint, so tables merged on natural keys
+        instead delete the rows whose keys are staged and insert the staged rows, in the
+        same transaction.
+        """
+        target = self._quoted_table_name(table_name.lower())
+        temp = self.connector.dialect.identifier_preparer.quote(f"merge_{table_name.lower()}")
+        columns = self._quoted_columns(df.columns)
+        key_columns = self._quoted_columns(keys)
+        insert = f"INSERT INTO {target} ({', '.join(columns)}) SELECT {', '.join(columns)} FROM {temp}"
+
+        with self.connector.begin() as connection:
+            connection.exec_driver_sql(f"CREATE TEMP TABLE {temp} (LIKE {target} INCLUDING DEFAULTS) ON COMMIT DROP")
+            with connection.connection.cursor() as cursor:
+                self._copy_dataframe(cursor, temp, df)
+            if keys == primary_keys().get(table_name.lower()):
+                updates = [f"{column} = EXCLUDED.{column}" for column in columns if column not in key_columns]
+                on_conflict = f"DO UPDATE SET {', '.join(updates)}" if updates else "DO NOTHING"
+                result = connection.exec_driver_sql(f"{insert} ON CONFLICT ({', '.join(key_columns)}) {on_conflict}")
+            else:
+                condition = ' AND '.join(f"t.{column} IS NOT DISTINCT FROM s.{column}" for column in key_columns)
+                connection.exec_driver_sql(f"DELETE FROM {target} t USING {temp} s WHERE {condition}")
+                result = connection.exec_driver_sql(insert)
+        logger.info(f"Merged {result.rowcount} rows into {target}.")
+
+    def _postgres_copy(self, table_name: str, df: pd.DataFrame):
+        """Stream a DataFrame into PostgreSQL with COPY FROM STDIN.
+
+        Rows are serialized CHUNK_SIZE at a time into an in-memory CSV buffer, so no
+        temporary files are written and the buffer never holds the whole table. All
+        chunks are committed in one transaction.
+        """
+        self._create_table(table_name, df)
+
+        connection = self.connector.raw_connection()
+        try:
+            with connection.cursor() as cursor:
+                self._copy_dataframe(cursor, self._quoted_table_name(table_name), df)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _postgres_write(self, table_name: str, df: pd.DataFrame):
+        """Write one DataFrame to PostgreSQL with the configured load method."""
+        df = restore_dtypes(df)
+        keys = self._merge_keys(table_name)
+        if keys is not None:
+            return self._postgres_merge(table_name, self._drop_duplicate_keys(table_name, df, keys), keys)
+        if self.load_mode == 'merge':
+            # merge mode targets the tables created from the schema file, which are lower case
+            table_name = table_name.lower()
+
+        if self.postgres_load_method == 'copy':
+            return self._postgres_copy(table_name, df)
+        self._to_sql(table_name, df)
+
+    def _check_copy_support(self):
+        """Fall back to to_sql when the DBAPI driver cannot COPY (it is not psycopg2).
+
+        Checked once per load, before any table is written, so the worker threads
+        only read the load method.
+        """
+        if self.postgres_load_method != 'copy':
+            return
+        connection = self.connector.raw_connection()
+        try:
+            cursor = connection.cursor()
+            supports_copy = hasattr(cursor, 'copy_expert')
+            cursor.close()
+        finally:
+            connection.close()
+        if not supports_copy:
+            logger.warning(f"The {self.connector.driver} driver has no copy_expert, loading with to_sql instead of COPY.")
+            self.postgres_load_method = 'to_sql'
+
+    def _timed_write(self, write: Callable[[str, pd.DataFrame], None], table_name: str, df: pd.DataFrame):
+        """Run write(table_name, df) as a 'load' stage of the run metrics."""
+        with self.metrics.stage('load', table_name, rows_in=len(df)) as record:
+            write(table_name, df)
+            record.rows_out = len(df)
+
+    def _load_tables(self, write: Callable[[str, pd.DataFrame], None]):
+        """Run write(table_name, df) for every table, following the foreign-key graph.
+
+        A table is submitted as soon as all tables it references have been loaded, so
+        independent tables load concurrently on up to `workers` pooled connections and
+        the total time approaches the longest chain of dependent tables.
+        """
+        tables = self.dataframe_table_mapping
+        pending = table_dependencies(list(tables))
+        done = set()
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(tables)))) as executor:
+            while pending or running:
+                for table_name in [name for name, parents in pending.items() if parents <= done]:
+                    del pending[table_name]
+                    running[executor.submit(self._timed_write, write, table_name, tables[table_name])] = table_name
+
+                if not running:
+                    raise ValueError(f"Circular foreign keys between tables: {', '.join(sorted(pending))}")
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    table_name = running.pop(future)
+                    try:
+                        future.result()
+                    except Exception:
+                        for other in running:
+                            other.cancel()
+                        raise
+                    done.add(table_name)
+                    logger.info(f"Data loaded into {table_name} table in {self.source}.")
 
     def _postgres_load_data(self):
         """Load data into PostgreSQL."""
@@ -45,21 +279,51 @@ class DataLoader(BaseDBConnection):
                 self.connector = self._connection()
                 logger.info("Connected to PostgreSQL successfully.")
 
-            for table_name, df in self.dataframe_table_mapping.items():
-                df.to_sql(
-                    table_name,
-                    con=self.connector,
-                    schema=self.schema,
-                    if_exists='append',
-                    index=False,
-                    chunksize=config['CHUNK_SIZE']
-                )
-                logger.info(f"Data loaded into {table_name} table in PostgreSQL.")
+            self._check_copy_support()
+            self._load_tables(self._postgres_write)
         except Exception as e:
             logger.error(f"Error loading data into PostgreSQL: {e}")
             self._close_connection()
             raise
 
+    def _snowflake_merge(self, table_name: str, df: pd.DataFrame, keys: list[str]):
+        """Upsert a DataFrame: stage it into a temporary table, then run one MERGE
+        against the schema-declared table."""
+        target = self._quoted_table_name(table_name.lower())
+        temp = self._quoted_table_name(f"merge_{table_name.lower()}")
+        columns = self._quoted_columns(df.columns)
+        key_columns = self._quoted_columns(keys)
+        # natural keys may be NULL, primary keys never are
+        condition = ' AND '.join(f"t.{column} IS NOT DISTINCT FROM s.{column}" for column in key_columns)
+        updates = ', '.join(f"t.{column} = s.{column}" for column in columns if column not in key_columns)
+        when_matched = f"WHEN MATCHED THEN UPDATE SET {updates} " if updates else ""
+
+        with self.connector.begin() as connection:
+            connection.exec_driver_sql(f"CREATE TEMPORARY TABLE {temp} LIKE {target}")
+            staged_load(SnowflakeStage(connection), temp, df)
+            connection.exec_driver_sql(
+                f"MERGE INTO {target} t USING {temp} s ON {condition} {when_matched}"
+                f"WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) "
+                f"VALUES ({', '.join(f's.{column}' for column in columns)})")
+        logger.info(f"Merged {len(df)} rows into {target}.")
+
+    def _snowflake_write(self, table_name: str, df: pd.DataFrame):
+        """Write one DataFrame to Snowflake, through a stage for large tables."""
+        df = restore_dtypes(df)
+        keys = self._merge_keys(table_name)
+        if keys is not None:
+            return self._snowflake_merge(table_name, self._drop_duplicate_keys(table_name, df, keys), keys)
+        if self.load_mode == 'merge':
+            table_name = table_name.lower()
+
+        if self.snowflake_load_method == 'to_sql' or len(df) < config['SNOWFLAKE_STAGE_MIN_ROWS']:
+            return self._to_sql(table_name, df)
+
+        self._create_table(table_name, df)
+        with self.connector.connect() as connection:
+            staged_load(SnowflakeStage(connection), self._quoted_table_name(table_name), df)
+            connection.commit()
+
     def _snowflake_load_data(self):
         """Load data into snowflake."""
 
@@ -68,17 +332,7 @@ class DataLoader(BaseDBConnection):
                 self.connector = self._connection()
                 logger.info("Connected to Snowflake successfully.")
 
-            for table_name, df in self.dataframe_table_mapping.items():
-                logger.info(f"Loading data into {table_name} table in Snowflake.")
-                df.to_sql(
-                    table_name,
-                    con=self.connector,
-                    schema=self.schema,
-                    if_exists='append',
-                    index=False,
-                    chunksize=config['CHUNK_SIZE']
-                )
-                logger.info(f"Data loaded into {table_name} table in snowflake.")
+            self._load_tables(self._snowflake_write)
         except Exception as e:
             logger.error(f"Error loading data into Snowflake: {e}")
             self._close_connection()
@@ -86,10 +340,19 @@ class DataLoader(BaseDBConnection):
 
     def _csv_load_data(self, directory= config['CLEANED_DATA_DIR']):
         """Load data from CSV files into the target database."""
+        def write(name: str, frame: pd.DataFrame):
+            path = f"{directory}/{name}.csv"
+            append = self.append_files and os.path.exists(path)
+            restore_dtypes(frame).to_csv(path, mode='a' if append else 'w', header=not append, index=False)
+
         for table_name, df in self.dataframe_table_mapping.items():
-            df.to_csv(f"{directory}/{table_name}.csv", index=False)
+            self._timed_write(write, table_name, df)
             logger.info(f"Data saved to {table_name}.csv in {directory} directory.")
 
+    def _columnar_load_data(self, directory=config['CLEANED_DATA_DIR']):
+        """Write the tables as compressed Parquet or Feather datasets."""
+        ColumnarFileSink(directory, file_format=self.source, metrics=self.metrics).write(self.dataframe_table_mapping)
+
     def load_data(self):
         """Load data into the target database."""
 
@@ -102,12 +365,65 @@ class DataLoader(BaseDBConnection):
         elif self.source == 'CSV':
             self._csv_load_data()
 
+        elif self.source in ('parquet', 'feather'):
+            self._columnar_load_data()
+
         else:
             raise ValueError("Unsupported source type")
 
         self._close_connection()
         return self
 
+    def load_stream(self, directory=config['CLEANED_DATA_DIR']):
+        """Load (table_name, chunk) pairs as they arrive, holding one chunk at a time.
+
+        Database targets append every chunk. For CSV the first chunk of a table
+        overwrites the file with a header and later chunks are appended to it.
+        """
+
+        chunks = self.dataframe_table_mapping
+        if isinstance(chunks, dict):
+            chunks = chunks.items()
+
+        started_tables = set()
+        try:
+            for table_name, df in chunks:
+                first_chunk = table_name not in started_tables
+                started_tables.add(table_name)
+
+                if self.source in ('postgres', 'snowflake'):
+                    if self.connector is None:
+                        self.connector = self._connection()
+                        logger.info(f"Connected to {self.source} successfully.")
+                    if self.source == 'postgres' and first_chunk:
+                        self._check_copy_support()
+
+                    self._timed_write(self._postgres_write if self.source == 'postgres' else self._snowflake_write,
+                                      table_name, df)
+
+                elif self.source == 'CSV':
+                    self._timed_write(
+                        lambda name, frame: restore_dtypes(frame).to_csv(
+                            f"{directory}/{name}.csv", mode='w' if first_chunk else 'a', header=first_chunk, index=False),
+                        table_name, df)
+
+                elif self.source in ('parquet', 'feather'):
+                    raise ValueError(f"Streaming loads are not supported for {self.source}; "
+                                     f"columnar tables are written whole with load_data().")
+
+                else:
+                    raise ValueError("Unsupported source type")
+
+                logger.debug(f"Loaded chunk of {len(df)} rows into {table_name} ({self.source}).")
+        except Exception as e:
+            logger.error(f"Error loading data stream into {self.source}: {e}")
+            raise
+        finally:
+            self._close_connection()
+
+        logger.info(f"Data stream loaded into {len(started_tables)} tables in {self.source}.")
+        return self
+
 
 if __name__ == "__main__":
     # Example: Load multiple Olist tables
@@ -0,0 +1,290 @@
+"""Per-stage, per-table run metrics, exported as a JSON report and a Prometheus text file.
+
+    metrics = RunMetrics()
+    with metrics.stage('extract', 'ORDERS') as record:
+        df = read_orders()
+        record.rows_out = len(df)
+    metrics.finish(success=True)
+    metrics.write_json('data/metrics/run.json')
+    metrics.write_prometheus('data/metrics/olist_etl.prom')
+
+Records of the same stage and table are merged (streaming chunks add up). Peak RSS is
+the highest resident set size of the process sampled while the stage ran, so stages
+running concurrently share their peaks.
+"""
+
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+from config.config import config
+from config.log_config import get_logger
+
+logger = get_logger(__name__)
+
+PROMETHEUS_PREFIX = 'olist_etl'
+
+
+def _current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes. Without psutil this falls back to
+    the process-lifetime peak from getrusage, and to None where that is unavailable."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    table: str
+    seconds: float = 0.0
+    rows_in: Optional[int] = None
+    rows_out: Optional[int] = None
+    peak_rss_bytes: Optional[int] = None
+    extra: dict = field(default_factory=dict)
+
+    @property
+    def rows_per_second(self) -> Optional[float]:
+        rows = self.rows_in if self.rows_in is not None else self.rows_out
+        return rows / self.seconds if rows is not None and self.seconds > 0 else None
+
+    def merge(self, other: "StageRecord"):
+        self.seconds += other.seconds
+        for name in ('rows_in', 'rows_out'):
+            if getattr(other, name) is not None:
+                setattr(self, name, (getattr(self, name) or 0) + getattr(other, name))
+        if other.peak_rss_bytes is not None:
+            self.peak_rss_bytes = max(self.peak_rss_bytes or 0, other.peak_rss_bytes)
+        for key, value in other.extra.items():
+            if isinstance(value, (int, float)) and isinstance(self.extra.get(key), (int, float)):
+                self.extra[key] = max(self.extra[key], value) if 'peak' in key else self.extra[key] + value
+            else:
+                self.extra[key] = value
+
+
+class _RssSampler:
+    """Background thread updating the peak RSS of every open stage record."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.active: set[int] = set()
+        self.peaks: dict[int, int] = {}
+        self.keys = itertools.count()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def open(self) -> int:
+        key = next(self.keys)
+        rss = _current_rss()
+        with self.lock:
+            self.active.add(key)
+            self.peaks[key] = rss or 0
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+                self.thread.start()
+        return key
+
+    def close(self, key: int) -> Optional[int]:
+        rss = _current_rss()
+        with self.lock:
+            self.active.discard(key)
+            peak = max(self.peaks.pop(key, 0), rss or 0)
+        return peak or None
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            rss = _current_rss()
+            with self.lock:
+                if not self.active:
+                    self.thread = None
+                    return
+                for key in self.active:
+                    self.peaks[key] = max(self.peaks[key], rss or 0)
+
+
+class RunMetrics:
+    enabled = True
+
+    def __init__(self, run_id: Optional[str] = None, *, rss_interval: float = config['METRICS_RSS_INTERVAL']):
+        """Collect metrics of one pipeline run.
+
+        Args:
+            run_id (str, optional): Identifier of the run; defaults to a UTC timestamp.
+            rss_interval (float): Seconds between RSS samples while a stage is running.
+        """
+        self.started_at = datetime.now(timezone.utc)
+        self.run_id = run_id or self.started_at.strftime('%Y%m%dT%H%M%SZ')
+        self.records: dict[tuple[str, str], StageRecord] = {}
+        self.seconds: Optional[float] = None
+        self.success: Optional[bool] = None
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._sampler = _RssSampler(rss_interval)
+        self._nested = threading.local()
+
+    def add(self, record: StageRecord):
+        """Add a record measured elsewhere, e.g. in a worker process."""
+        with self._lock:
+            key = (record.stage, record.table)
+            if key in self.records:
+                self.records[key].merge(record)
+            else:
+                self.records[key] = record
+
+    @contextmanager
+    def stage(self, stage: str, table: str, *, rows_in: Optional[int] = None) -> Iterator[StageRecord]:
+        """Time a block of work on one table; set rows_out on the yielded record."""
+        record = StageRecord(stage, table, rows_in=rows_in)
+        key = self._sampler.open()
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            record.peak_rss_bytes = self._sampler.close(key)
+            self.add(record)
+
+    def timed_iter(self, stage: str, items: Iterable[tuple[str, object]]) -> Iterator[tuple[str, object]]:
+        """Wrap a (table_name, chunk) generator, charging the time spent producing each
+        chunk to its table. Time spent in timed_iter generators nested inside it on the
+        same thread is not counted twice."""
+        iterator = iter(items)
+        stack = self._nested.__dict__.setdefault('stack', [])
+        while True:
+            stack.append(0.0)
+            start = time.perf_counter()
+            try:
+                table_name, chunk = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                elapsed = time.perf_counter() - start
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+            self.add(StageRecord(stage, table_name, seconds=elapsed - nested, rows_out=len(chunk),
+                                 peak_rss_bytes=_current_rss()))
+            yield table_name, chunk
+
+    def finish(self, success: bool):
+        self.seconds = time.perf_counter() - self._start
+        self.success = success
+
+    def summary(self) -> str:
+        lines = [f"{'stage':<10}{'table':<18}{'seconds':>9}{'rows in':>11}{'rows out':>11}{'rows/s':>11}{'peak RSS':>11}"]
+        for record in self.records.values():
+            rate = record.rows_per_second
+            lines.append(
+                f"{record.stage:<10}{record.table:<18}{record.seconds:>9.2f}"
+                f"{'' if record.rows_in is None else record.rows_in:>11}"
+                f"{'' if record.rows_out is None else record.rows_out:>11}"
+                f"{'' if rate is None else f'{rate:.0f}':>11}"
+                f"{'' if record.peak_rss_bytes is None else f'{record.peak_rss_bytes / 2 ** 20:.0f} MiB':>11}")
+        return '\n'.join(lines)
+
+    def to_dict(self) -> dict:
+        return {
+            'run_id': self.run_id,
+            'started_at': self.started_at.isoformat(timespec='seconds'),
+            'seconds': self.seconds,
+            'success': self.success,
+            'stages': [{**asdict(record), 'rows_per_second': record.rows_per_second}
+                       for record in self.records.values()],
+        }
+
+    def to_prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format."""
+        series = {
+            'stage_duration_seconds': ('gauge', "Wall time of a stage for one table in the last run.",
+                                       lambda record: record.seconds),
+            'stage_rows_in': ('gauge', "Rows entering a stage.", lambda record: record.rows_in),
+            'stage_rows_out': ('gauge', "Rows leaving a stage.", lambda record: record.rows_out),
+            'stage_rows_per_second': ('gauge', "Stage throughput.", lambda record: record.rows_per_second),
+            'stage_peak_rss_bytes': ('gauge', "Peak resident memory sampled during the stage.",
+                                     lambda record: record.peak_rss_bytes),
+        }
+        lines = []
+        for name, (kind, help_text, value_of) in series.items():
+            lines += [f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}", f"# TYPE {PROMETHEUS_PREFIX}_{name} {kind}"]
+            for record in self.records.values():
+                value = value_of(record)
+                if value is not None:
+                    lines.append(f'{PROMETHEUS_PREFIX}_{name}{{stage="{record.stage}",table="{record.table}"}} {value}')
+
+        run = {
+            'run_duration_seconds': ("Wall time of the last run.", self.seconds),
+            'run_success': ("1 if the last run succeeded, 0 if it failed.",
+                            None if self.success is None else int(self.success)),
+            'run_timestamp_seconds': ("Unix time the last run started.", self.started_at.timestamp()),
+        }
+        for name, (help_text, value) in run.items():
+            if value is not None:
+                lines += [f"# HELP {PROMETHEUS_PREFIX}_{name} {help_text}", f"# TYPE {PROMETHEUS_PREFIX}_{name} gauge",
+                          f"{PROMETHEUS_PREFIX}_{name} {value}"]
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _write(path: str, content: str):
+        # the node exporter textfile collector must never read a half-written file
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as file:
+            file.write(content)
+        os.replace(temp_path, path)
+
+    def write_json(self, path: str):
+        self._write(path, json.dumps(self.to_dict(), indent=2))
+
+    def write_prometheus(self, path: str):
+        self._write(path, self.to_prometheus())
+
+    def export(self, directory: str = config['METRICS_DIR'], prometheus_file: str = config['METRICS_PROMETHEUS_FILE']):
+        """Write the JSON report to '<directory>/run_<run_id>.json' and the Prometheus text file."""
+        self.write_json(os.path.join(directory, f"run_{self.run_id}.json"))
+        if prometheus_file:
+            self.write_prometheus(prometheus_file)
+        logger.info(f"Run metrics written to {directory}\n{self.summary()}")
+
+
+class NullMetrics(RunMetrics):
+    """Stand-in when no metrics are collected; every call is a cheap no-op."""
+
+    enabled = False
+
+    def __init__(self):
+        pass
+
+    def add(self, record: StageRecord):
+        pass
+
+    @contextmanager
+    def stage(self, stage: str, table: str, *, rows_in: Optional[int] = None) -> Iterator[StageRecord]:
+        yield StageRecord(stage, table, rows_in=rows_in)
+
+    def timed_iter(self, stage: str, items: Iterable[tuple[str, object]]) -> Iterator[tuple[str, object]]:
+        return iter(items)
+
+    def finish(self, success: bool):
+        pass
+
+    def export(self, *args, **kwargs):
+        pass
+
+
+NO_METRICS = NullMetrics()
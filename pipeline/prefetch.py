@@ -0,0 +1,77 @@
+"""Background prefetching that lets consecutive streaming stages overlap."""
+
+import queue
+import threading
+from typing import Iterable, Iterator, TypeVar
+
+from config.config import config
+from config.log_config import get_logger
+
+logger = get_logger(__name__)
+
+T = TypeVar('T')
+
+_DONE = object()
+
+
+class _Failure:
+    """Carries an exception raised by the producer over to the consumer thread."""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def prefetch(iterable: Iterable[T], *, maxsize: int = config['PIPELINE_QUEUE_SIZE'],
+             name: str = 'prefetch') -> Iterator[T]:
+    """Iterate `iterable` on a background thread, up to `maxsize` items ahead of the consumer.
+
+    The bounded queue applies backpressure: the producer blocks while the consumer is
+    `maxsize` items behind. An exception in the producer is re-raised in the consumer,
+    and closing the returned generator stops the producer, closes `iterable` and waits
+    for the thread to finish.
+
+    Args:
+        iterable (Iterable): The upstream stage, e.g. DataExtractor.extract_chunks().
+        maxsize (int): Maximum number of items buffered between the two stages.
+        name (str): Name of the producer thread, shown in logs.
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if not put(item):
+                    break
+            else:
+                put(_DONE)
+        except BaseException as e:
+            put(_Failure(e))
+        finally:
+            if hasattr(iterator, 'close'):
+                iterator.close()
+
+    thread = threading.Thread(target=produce, name=name, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+        logger.debug(f"Prefetch thread {name} stopped.")
@@ -0,0 +1,130 @@
+"""Table keys declared in the SQL schema files under database/."""
+
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+from config.config import config
+
+_CREATE_TABLE = re.compile(r"CREATE TABLE(?: IF NOT EXISTS)?\s+([\w.]+)\s*\((.*?)\);", re.IGNORECASE | re.DOTALL)
+_TABLE_PRIMARY_KEY = re.compile(r"^PRIMARY KEY\s*\(([^)]*)\)", re.IGNORECASE)
+_INLINE_PRIMARY_KEY = re.compile(r"^(\w+)\s+.*\bPRIMARY KEY\b", re.IGNORECASE)
+_TABLE_FOREIGN_KEY = re.compile(r"^FOREIGN KEY\s*\(([^)]*)\)\s*REFERENCES\s+([\w.]+)\s*\(([^)]*)\)", re.IGNORECASE)
+_INLINE_FOREIGN_KEY = re.compile(r"^(\w+)\s+.*\bREFERENCES\s+([\w.]+)\s*\(([^)]*)\)", re.IGNORECASE)
+
+
+class ForeignKey(NamedTuple):
+    columns: list[str]
+    parent: str
+    parent_columns: list[str]
+
+
+def _table_bodies(schema_path: str) -> dict[str, list[str]]:
+    """Map each unqualified, lower-case table name to its definition lines."""
+    with open(schema_path, 'r') as file:
+        sql = re.sub(r"--[^\n]*", "", file.read())
+
+    tables = {}
+    for qualified_name, body in _CREATE_TABLE.findall(sql):
+        lines = [line.strip().rstrip(',') for line in body.splitlines()]
+        tables[qualified_name.split('.')[-1].lower()] = [line for line in lines if line]
+    return tables
+
+
+def _split_columns(columns: str) -> list[str]:
+    return [column.strip().lower() for column in columns.split(',')]
+
+
+@lru_cache(maxsize=None)
+def primary_keys(schema_path: str = config['STAGE_SCHEMA_PATH']) -> dict[str, list[str]]:
+    """Primary key columns of every table that declares one.
+
+        {'orders': ['order_id'], 'order_items': ['order_id', 'order_item_id'], ...}
+    """
+    keys = {}
+    for table, lines in _table_bodies(schema_path).items():
+        for line in lines:
+            table_key = _TABLE_PRIMARY_KEY.match(line)
+            inline_key = _INLINE_PRIMARY_KEY.match(line)
+            if table_key:
+                keys[table] = _split_columns(table_key.group(1))
+            elif inline_key and not line.upper().startswith(('FOREIGN KEY', 'PRIMARY KEY')):
+                keys[table] = [inline_key.group(1).lower()]
+    return keys
+
+
+def merge_keys(schema_path: str = config['STAGE_SCHEMA_PATH'],
+               natural_keys: dict = None) -> dict[str, list[str]]:
+    """Columns identifying the rows of every table for merge loads: the primary keys of
+    the schema, plus the MERGE_NATURAL_KEYS of tables that declare none."""
+    natural_keys = natural_keys if natural_keys is not None else config.get('MERGE_NATURAL_KEYS') or {}
+    keys = {table.lower(): [column.lower() for column in columns] for table, columns in natural_keys.items()}
+    return {**keys, **primary_keys(schema_path)}
+
+
+@lru_cache(maxsize=None)
+def foreign_keys(schema_path: str = config['STAGE_SCHEMA_PATH']) -> dict[str, list[ForeignKey]]:
+    """Foreign keys of every table that declares one, parents unqualified and lower case.
+
+        {'orders': [ForeignKey(columns=['customer_id'], parent='customers', parent_columns=['customer_id'])], ...}
+    """
+    keys = {}
+    for table, lines in _table_bodies(schema_path).items():
+        for line in lines:
+            match = _TABLE_FOREIGN_KEY.match(line)
+            if match:
+                columns = _split_columns(match.group(1))
+            else:
+                match = _INLINE_FOREIGN_KEY.match(line)
+                if not match or line.upper().startswith(('PRIMARY KEY', 'CONSTRAINT')):
+                    continue
+                columns = [match.group(1).lower()]
+            parent = match.group(2).split('.')[-1].lower()
+            keys.setdefault(table, []).append(ForeignKey(columns, parent, _split_columns(match.group(3))))
+    return keys
+
+
+def referenced_keys(schema_path: str = config['STAGE_SCHEMA_PATH']) -> dict[str, list[str]]:
+    """Columns of every table that foreign keys reference, parents lower case.
+
+        {'customers': ['customer_id'], 'orders': ['order_id'], ...}
+    """
+    keys = {}
+    for table_keys in foreign_keys(schema_path).values():
+        for key in table_keys:
+            columns = keys.setdefault(key.parent, [])
+            columns.extend(column for column in key.parent_columns if column not in columns)
+    return keys
+
+
+def table_dependencies(table_names, schema_path: str = config['STAGE_SCHEMA_PATH']) -> dict[str, set[str]]:
+    """Map each of `table_names` to the names among them that it references.
+
+    Names are matched to the schema case-insensitively and returned as given, so
+    {'ORDERS', 'CUSTOMERS'} maps to {'ORDERS': {'CUSTOMERS'}, 'CUSTOMERS': set()}.
+    Self references are ignored.
+    """
+    by_lower = {name.lower(): name for name in table_names}
+    declared = foreign_keys(schema_path)
+    return {
+        name: {by_lower[key.parent] for key in declared.get(name.lower(), [])
+               if key.parent in by_lower and key.parent != name.lower()}
+        for name in table_names
+    }
+
+
+def topological_order(table_names, schema_path: str = config['STAGE_SCHEMA_PATH']) -> list[str]:
+    """`table_names` ordered so every table comes after the tables it references.
+
+    Tables that do not depend on each other keep their given order.
+    """
+    pending = table_dependencies(list(table_names), schema_path)
+    ordered = []
+    while pending:
+        ready = [name for name, parents in pending.items() if parents <= set(ordered)]
+        if not ready:
+            raise ValueError(f"Circular foreign keys between tables: {', '.join(sorted(pending))}")
+        for name in ready:
+            del pending[name]
+        ordered.extend(ready)
+    return ordered
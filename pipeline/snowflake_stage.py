@@ -0,0 +1,130 @@
+"""Staged bulk load for Snowflake: Parquet files -> internal stage -> COPY INTO."""
+
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from config.config import config
+from config.log_config import get_logger
+
+logger = get_logger(__name__)
+
+
+def create_stage_sql(stage: str) -> str:
+    """SQL creating a session-scoped internal stage for Parquet files."""
+    return f"CREATE TEMPORARY STAGE IF NOT EXISTS {stage} FILE_FORMAT = (TYPE = PARQUET)"
+
+
+def put_sql(path: str, stage: str, prefix: str) -> str:
+    """SQL uploading one local file to stage/prefix. Files are already compressed Parquet."""
+    return f"PUT 'file://{os.path.abspath(path)}' @{stage}/{prefix}/ AUTO_COMPRESS = FALSE OVERWRITE = TRUE"
+
+
+def copy_into_sql(table: str, stage: str, prefix: str) -> str:
+    """SQL loading every file under stage/prefix into table, matching Parquet columns by name."""
+    return (f"COPY INTO {table} FROM @{stage}/{prefix}/ "
+            f"FILE_FORMAT = (TYPE = PARQUET) MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE PURGE = TRUE")
+
+
+def write_parquet_chunks(df: pd.DataFrame, directory: str, *, rows_per_file: int,
+                         compression: str = config['SNOWFLAKE_STAGE_COMPRESSION']) -> list[str]:
+    """Write a DataFrame as compressed Parquet files of at most rows_per_file rows each."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    paths = []
+    for part, start in enumerate(range(0, max(len(df), 1), rows_per_file)):
+        table = pa.Table.from_pandas(df.iloc[start:start + rows_per_file], preserve_index=False)
+        path = os.path.join(directory, f"part-{part:05d}.parquet")
+        # Snowflake reads microsecond timestamps, pandas keeps nanoseconds
+        pq.write_table(table, path, compression=compression, coerce_timestamps='us', allow_truncated_timestamps=True)
+        paths.append(path)
+    return paths
+
+
+class Stage(ABC):
+    """Where staged files go and how they are copied into tables."""
+
+    @abstractmethod
+    def create(self):
+        pass
+
+    @abstractmethod
+    def put(self, path: str, prefix: str):
+        pass
+
+    @abstractmethod
+    def copy_into(self, table: str, prefix: str):
+        pass
+
+
+class SnowflakeStage(Stage):
+    """Runs the generated stage SQL on one Snowflake SQLAlchemy connection.
+
+    The stage is temporary, so PUT and COPY INTO must share the connection that created it.
+    """
+
+    def __init__(self, connection, stage: str = config['SNOWFLAKE_STAGE']):
+        self.connection = connection
+        self.stage = stage
+
+    def _execute(self, sql: str):
+        logger.debug(f"Snowflake stage: {sql}")
+        self.connection.exec_driver_sql(sql)
+
+    def create(self):
+        self._execute(create_stage_sql(self.stage))
+
+    def put(self, path: str, prefix: str):
+        self._execute(put_sql(path, self.stage, prefix))
+
+    def copy_into(self, table: str, prefix: str):
+        self._execute(copy_into_sql(table, self.stage, prefix))
+
+
+class LocalStage(Stage):
+    """Local stand-in for a Snowflake stage: the stage is a directory and COPY INTO reads
+    the staged Parquet files back into the DataFrames of `tables`. Records the SQL a
+    SnowflakeStage would have run in `statements`."""
+
+    def __init__(self, directory: str, stage: str = config['SNOWFLAKE_STAGE']):
+        self.directory = directory
+        self.stage = stage
+        self.tables: dict[str, pd.DataFrame] = {}
+        self.statements: list[str] = []
+
+    def create(self):
+        self.statements.append(create_stage_sql(self.stage))
+        os.makedirs(self.directory, exist_ok=True)
+
+    def put(self, path: str, prefix: str):
+        self.statements.append(put_sql(path, self.stage, prefix))
+        os.makedirs(os.path.join(self.directory, prefix), exist_ok=True)
+        shutil.copy(path, os.path.join(self.directory, prefix, os.path.basename(path)))
+
+    def copy_into(self, table: str, prefix: str):
+        self.statements.append(copy_into_sql(table, self.stage, prefix))
+        stage_dir = os.path.join(self.directory, prefix)
+        files = sorted(os.path.join(stage_dir, name) for name in os.listdir(stage_dir))
+        loaded = pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+        self.tables[table] = pd.concat([self.tables[table], loaded], ignore_index=True) if table in self.tables else loaded
+        shutil.rmtree(stage_dir)  # PURGE = TRUE
+
+
+def staged_load(stage: Stage, table: str, df: pd.DataFrame, *,
+                rows_per_file: int = config['SNOWFLAKE_STAGE_FILE_ROWS']):
+    """Load a DataFrame into `table` through `stage`: write Parquet chunks to a temporary
+    directory, upload them and issue one COPY INTO for the table."""
+    prefix = table.replace('"', '').replace('.', '_').lower()
+
+    with tempfile.TemporaryDirectory(prefix="olist_stage_") as directory:
+        paths = write_parquet_chunks(df, directory, rows_per_file=rows_per_file)
+        stage.create()
+        for path in paths:
+            stage.put(path, prefix)
+        stage.copy_into(table, prefix)
+
+    logger.info(f"Staged {len(df)} rows in {len(paths)} Parquet files and copied them into {table}.")
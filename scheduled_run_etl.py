@@ -1,21 +1,174 @@
-from etl_pipeline import ETLPipeline
-import schedule
+"""Long-lived ETL daemon.
+
+    python scheduled_run_etl.py
+
+Runs the pipeline every DAEMON_INTERVAL_SECONDS and whenever files in DAEMON_WATCH_DIR
+are added or changed. The process stays up between runs, so imports, the parsed schema
+and the database engine are reused instead of being rebuilt for every run. A trigger
+arriving while a run is in progress is skipped rather than queued, and DAEMON_LOCK_FILE
+also keeps a second daemon or a manual run from overlapping. SIGTERM or Ctrl-C lets the
+current run finish its loads before the daemon exits; a second signal aborts it.
+"""
+
+import os
+import signal
+import threading
 import time
 
+from config.config import config
+from config.log_config import get_logger
+from etl_pipeline import ETLPipeline
+from pipeline.base_db_connection import get_engine
+
+try:
+    import fcntl
+except ImportError:  # Windows: the lock only guards runs within this process
+    fcntl = None
+
+logger = get_logger(__name__)
+
+
+class RunLock:
+    def __init__(self, path: str = config['DAEMON_LOCK_FILE']):
+        """Non-blocking lock held for the duration of one run.
+
+        Args:
+            path (str): Lock file, flock-ed so runs of other processes are excluded too.
+        """
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def acquire(self) -> bool:
+        """Take the lock, or return False at once if a run already holds it. Errors opening
+        the lock file are raised with the lock left free."""
+        if not self._thread_lock.acquire(blocking=False):
+            return False
+        if fcntl is None:
+            return True
+
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'a+')
+            fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._file.truncate(0)
+            self._file.write(str(os.getpid()))
+            self._file.flush()
+        except BaseException as e:
+            # an unwritable lock path must not keep every later run locked out
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._thread_lock.release()
+            if isinstance(e, BlockingIOError):
+                return False
+            raise
+        return True
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+        self._thread_lock.release()
+
+
+def directory_snapshot(directory: str) -> dict[str, tuple[int, int]]:
+    """Size and modification time of every file below directory, hidden files excluded."""
+    snapshot = {}
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [name for name in dirs if not name.startswith('.')]
+        for name in files:
+            if name.startswith('.'):
+                continue
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:  # removed while walking
+                continue
+            snapshot[os.path.relpath(path, directory)] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
 class ETL:
     def __init__(self, **kwargs):
         self.kwargs = kwargs
+        self.lock = RunLock()
+        self.stop_event = threading.Event()
+
+    def _warm_connector(self):
+        """The pooled engine of the load target, shared by every run of the process."""
+        source = self.kwargs.get('loading_pipeline_args', {}).get('source')
+        return get_engine(source) if source in ('postgres', 'snowflake') else None
+
+    def run(self) -> bool:
+        """Run the pipeline once, unless a run is already in progress. Returns whether it ran."""
+        if not self.lock.acquire():
+            logger.warning("An ETL run is still in progress, skipping this trigger.")
+            return False
+        try:
+            ETLPipeline(**self.kwargs, connector=self._warm_connector()).run()
+            return True
+        finally:
+            self.lock.release()
+
+    def stop(self, signum=None, frame=None):
+        """Ask the daemon to exit once the current run has finished."""
+        if self.stop_event.is_set():
+            raise KeyboardInterrupt
+        logger.info("Shutdown requested, waiting for the current run to finish.")
+        self.stop_event.set()
+
+    def serve(self, *, interval: float = config['DAEMON_INTERVAL_SECONDS'],
+              watch_dir: str = config['DAEMON_WATCH_DIR'], poll: float = config['DAEMON_POLL_SECONDS']):
+        """Run the pipeline now, then on the interval and on file changes until stopped.
 
-    def run(self):
-        ETLPipeline(**self.kwargs).run()
+        Args:
+            interval (float): Seconds between scheduled runs; 0 runs only on file changes.
+            watch_dir (str): Directory whose new or changed files trigger a run; empty to
+                run on the interval only. A change starts a run once the files have stayed
+                the same for one poll, so files still being copied are not read half-written.
+            poll (float): Seconds between checks of the schedule and of watch_dir.
+        """
+        handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            handlers = {signum: signal.signal(signum, self.stop) for signum in (signal.SIGINT, signal.SIGTERM)}
+
+        seen = pending = None
+        next_run = time.monotonic()
+        try:
+            while not self.stop_event.is_set():
+                trigger = 'schedule' if next_run is not None and time.monotonic() >= next_run else None
+                if watch_dir:
+                    current = directory_snapshot(watch_dir)
+                    if seen is not None and current != seen:
+                        if current == pending:
+                            trigger = trigger or 'new or changed files'
+                        pending = current
+
+                if trigger:
+                    logger.info(f"Starting ETL run ({trigger}).")
+                    snapshot = directory_snapshot(watch_dir) if watch_dir else None
+                    try:
+                        self.run()
+                    except Exception as e:
+                        logger.error(f"ETL run failed, waiting for the next trigger: {e}")
+                    # files changing during the run trigger another one
+                    seen, pending = snapshot, None
+                    next_run = time.monotonic() + interval if interval else None
+
+                self.stop_event.wait(poll)
+        finally:
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+            logger.info("ETL daemon stopped.")
 
     def scheduled_run(self, interval):
         """Run the ETL pipeline on a schedule."""
+        self.serve(interval=interval, watch_dir=None)
 
-        schedule.every(interval).seconds.do(self.run)
-        try:
-            while True:
-                schedule.run_pending()
-                time.sleep(1)
-        except KeyboardInterrupt:
-            print("\nStopped by user.")
\ No newline at end of file
+
+if __name__ == "__main__":
+    from main import pipeline_kwargs
+
+    ETL(**pipeline_kwargs()).serve()
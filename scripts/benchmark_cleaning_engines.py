@@ -0,0 +1,87 @@
+"""Check that the cleaning engines produce identical tables, and time each of them.
+
+Every table is extracted once, then cleaned by each engine. The polars result must
+equal the pandas result exactly: same rows in the same order, same index, same dtypes
+(categories included) and the same rejected counts per rule. tests/test_cleaning_engines.py
+checks this on the synthetic fixture; the script exits with status 1 on any difference,
+so it also checks parity on larger or real data:
+
+    python -m scripts.benchmark_cleaning_engines
+    python -m scripts.benchmark_cleaning_engines --data-dir data/synthetic/sf10 --repeat 3
+    python -m scripts.benchmark_cleaning_engines --untyped   # raw columns as pandas infers them
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+from config.config import TABLE_PATHS, config
+from pipeline.data_cleaning import DataCleaningFactory, set_copy_on_write
+from pipeline.data_processors.engines import ENGINES
+from pipeline.extractor import DataExtractor
+
+
+def clean(table_name: str, df: pd.DataFrame, engine: str):
+    cleaner = DataCleaningFactory.create_cleaner(table_name, df)
+    cleaner.engine = ENGINES[engine]()
+    return cleaner.clean(), cleaner.rule_report
+
+
+def best_time(func, repeat: int) -> float:
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+    return elapsed
+
+
+def difference(expected: tuple[pd.DataFrame, dict], actual: tuple[pd.DataFrame, dict]) -> str | None:
+    """Why actual differs from expected, or None when they are identical."""
+    if expected[1] != actual[1]:
+        return f"rule reports differ: {expected[1]} != {actual[1]}"
+    try:
+        pd.testing.assert_frame_equal(expected[0], actual[0], check_exact=True, check_categorical=True)
+    except AssertionError as e:
+        return str(e).strip().replace('\n', ' ')
+    return None
+
+
+if __name__ == "__main__":
+    set_copy_on_write()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=config['RAW_DATA_DIR'], help="directory with the raw CSV files")
+    parser.add_argument('--tables', nargs='*', help="tables to clean (default: every table the engines support)")
+    parser.add_argument('--engines', nargs='*', default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument('--repeat', type=int, default=1, help="timed runs per engine, the best one is kept")
+    parser.add_argument('--untyped', action='store_true', help="extract without the typed CSV read")
+    args = parser.parse_args()
+
+    baseline = args.engines[0]
+    failed = False
+    print(f"{'table':<18}{'rows':>12}" + ''.join(f"{engine + ' s':>12}" for engine in args.engines)
+          + f"{'speedup':>10}  parity")
+    for table_name, file_name in TABLE_PATHS.items():
+        path = os.path.join(args.data_dir, file_name)
+        cleaner_class = DataCleaningFactory.get_cleaner_class(table_name)
+        if (args.tables and table_name not in args.tables) or not os.path.exists(path) \
+                or not set(args.engines) <= set(cleaner_class.engines):
+            continue
+
+        df = DataExtractor('CSV', file_paths={table_name: path}, typed=not args.untyped).extract()[table_name]
+        results, seconds = {}, {}
+        for engine in args.engines:
+            results[engine] = clean(table_name, df, engine)
+            seconds[engine] = best_time(lambda: clean(table_name, df, engine), args.repeat)
+
+        problems = [f"{engine}: {problem}" for engine in args.engines[1:]
+                    if (problem := difference(results[baseline], results[engine])) is not None]
+        failed |= bool(problems)
+        speedup = seconds[baseline] / seconds[args.engines[-1]] if len(args.engines) > 1 else 1.0
+        print(f"{table_name:<18}{len(df):>12,}" + ''.join(f"{seconds[engine]:>12.3f}" for engine in args.engines)
+              + f"{speedup:>9.2f}x  {'; '.join(problems)[:300] if problems else 'identical'}")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,71 @@
+"""Compare CSV parse time and peak memory of infer-then-cast against typed reading.
+
+Run from the repository root:
+    python -m scripts.benchmark_csv_read
+    python -m scripts.benchmark_csv_read --data-dir data/synthetic/sf1
+"""
+
+import argparse
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+
+from config.config import TABLE_PATHS, config
+from pipeline.data_cleaning import DataCleaningFactory, set_copy_on_write
+from pipeline.extractor import DataExtractor
+
+
+def infer_then_cast(table_name: str, path: str) -> pd.DataFrame:
+    """The original path: let pandas infer every column, then cast in the cleaner."""
+    df = DataExtractor('CSV', file_paths={table_name: path}, typed=False).extract()[table_name]
+    cleaner = DataCleaningFactory.create_cleaner(table_name=table_name, dataframe=df)
+    return cleaner.clean()
+
+
+def typed_read(engine: str):
+    def read(table_name: str, path: str) -> pd.DataFrame:
+        df = DataExtractor('CSV', file_paths={table_name: path}, typed=True, engine=engine).extract()[table_name]
+        cleaner = DataCleaningFactory.create_cleaner(table_name=table_name, dataframe=df)
+        return cleaner.clean()
+    return read
+
+
+def measure(func, table_name: str, path: str, repeat: int = 3) -> tuple[float, float]:
+    """Return (best seconds, peak MiB). Memory is traced in a separate call so
+    tracemalloc overhead does not skew the timings."""
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(table_name, path)
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(table_name, path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+if __name__ == "__main__":
+    set_copy_on_write()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=config['RAW_DATA_DIR'], help="directory with the raw CSV files")
+    args = parser.parse_args()
+
+    strategies = {'infer+cast': infer_then_cast, 'typed[c]': typed_read('c')}
+    try:
+        import pyarrow  # noqa: F401
+        strategies['typed[pyarrow]'] = typed_read('pyarrow')
+    except ImportError:
+        print("pyarrow is not installed, skipping the pyarrow engine.")
+
+    print(f"{'table':<18}{'strategy':<16}{'seconds':>10}{'peak MiB':>12}")
+    for table_name, file_name in TABLE_PATHS.items():
+        path = os.path.join(args.data_dir, file_name)
+        if not os.path.exists(path):
+            continue
+        for strategy, func in strategies.items():
+            elapsed, peak = measure(func, table_name, path)
+            print(f"{table_name:<18}{strategy:<16}{elapsed:>10.3f}{peak:>12.1f}")
@@ -0,0 +1,72 @@
+"""Measure the cold import time of the entry points with `python -X importtime`.
+
+Each module is imported in a fresh interpreter several times and the best total is
+kept. Heavy optional dependencies must stay out of a CSV-only import; the script exits
+with status 1 when one of them is imported or a module exceeds its time budget, so it
+can guard against regressions in CI:
+
+    python -m scripts.benchmark_import_time --max-ms 1500
+    python -m scripts.benchmark_import_time --modules main etl_pipeline --top 10
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = ['main', 'etl_pipeline', 'scheduled_run_etl']
+# imported only by the runs that use them (pyarrow is not listed, pandas imports it itself)
+FORBIDDEN = ['snowflake', 'sqlalchemy', 'psycopg2', 'psutil', 'polars']
+
+
+def import_profile(module: str) -> tuple[float, dict[str, float], set[str]]:
+    """Import module in a fresh interpreter. Returns the total milliseconds, the cumulative
+    milliseconds of every imported module and the top-level packages that were loaded."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        capture_output=True, text=True, cwd=os.getcwd(), env={**os.environ, 'PYTHONDONTWRITEBYTECODE': '1'})
+    if result.returncode != 0:
+        raise ValueError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(cumulative_us) / 1000
+    packages = {name.split('.')[0] for name in cumulative}
+    return cumulative.get(module, 0.0), cumulative, packages
+
+
+def benchmark(modules: list[str], *, repeat: int, forbidden: list[str]) -> list[dict]:
+    results = []
+    for module in modules:
+        runs = [import_profile(module) for _ in range(repeat)]
+        total, cumulative, packages = min(runs, key=lambda run: run[0])
+        results.append({'module': module, 'ms': total, 'cumulative': cumulative,
+                        'forbidden': sorted(set(forbidden) & packages)})
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='*', default=DEFAULT_MODULES)
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per module, the best one is kept")
+    parser.add_argument('--forbid', nargs='*', default=FORBIDDEN, help="packages a plain import must not load")
+    parser.add_argument('--max-ms', type=float, help="fail when a module takes longer to import")
+    parser.add_argument('--top', type=int, default=0, help="also list the N slowest imports of each module")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<22}{'import ms':>10}  forbidden packages loaded")
+    for result in benchmark(args.modules, repeat=args.repeat, forbidden=args.forbid):
+        over_budget = args.max_ms is not None and result['ms'] > args.max_ms
+        failed |= over_budget or bool(result['forbidden'])
+        print(f"{result['module']:<22}{result['ms']:>10.1f}  {', '.join(result['forbidden']) or '-'}"
+              f"{'  OVER BUDGET' if over_budget else ''}")
+        if args.top:
+            slowest = sorted(result['cumulative'].items(), key=lambda item: item[1], reverse=True)
+            for name, ms in [item for item in slowest if item[0] != result['module']][:args.top]:
+                print(f"    {name:<40}{ms:>10.1f}")
+
+    sys.exit(1 if failed else 0)
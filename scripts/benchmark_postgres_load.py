@@ -0,0 +1,64 @@
+"""Compare rows/second of the COPY and to_sql PostgreSQL load methods.
+
+Needs a local PostgreSQL instance configured through the POSTGRES_* variables in .env.
+Each method loads the products table, repeated up to --rows rows, into a fresh table
+of a scratch schema which is dropped afterwards.
+
+Run from the repository root:
+    python -m scripts.benchmark_postgres_load --rows 500000
+"""
+
+import argparse
+import time
+
+import pandas as pd
+from sqlalchemy import text
+
+from config.config import config
+from pipeline.data_cleaning import DataCleaningFactory
+from pipeline.loader import DataLoader
+
+SCHEMA = 'benchmark_load'
+
+
+def benchmark_rows(rows: int) -> pd.DataFrame:
+    raw = pd.read_csv(config['RAW_DATA_DIR'] + config['PRODUCTS_PATH'])
+    cleaned = DataCleaningFactory.create_cleaner(config['PRODUCTS_TABLE'], raw).clean()
+    repeats = -(-rows // len(cleaned))
+    return pd.concat([cleaned] * repeats, ignore_index=True).head(rows)
+
+
+def time_load(df: pd.DataFrame, method: str) -> float:
+    table_name = f"products_{method}"
+    loader = DataLoader('postgres', dataframe_table_mapping={table_name: df}, schema=SCHEMA,
+                        postgres_load_method=method)
+    loader.connector = loader._connection()
+
+    start = time.perf_counter()
+    loader._postgres_load_data()
+    elapsed = time.perf_counter() - start
+
+    loader._close_connection()
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=200_000)
+    args = parser.parse_args()
+
+    df = benchmark_rows(args.rows)
+    engine = DataLoader('postgres', dataframe_table_mapping={}, schema=SCHEMA)._connection()
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+    try:
+        print(f"{'method':<10}{'rows':>10}{'seconds':>10}{'rows/s':>12}")
+        for method in ['to_sql', 'copy']:
+            elapsed = time_load(df, method)
+            print(f"{method:<10}{len(df):>10}{elapsed:>10.2f}{len(df) / elapsed:>12.0f}")
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
@@ -0,0 +1,54 @@
+"""Check that sharded cleaning returns the tables clean() returns, and time both.
+
+Each table is cleaned whole by its cleaner, then split into --shards shards cleaned by
+--workers processes and merged. The merged table must be identical (rows, order,
+index, dtypes and categories); the script exits with status 1 otherwise:
+
+    python -m scripts.benchmark_sharded_cleaning --data-dir data/synthetic/sf10 --workers 8 --shards 8
+"""
+
+import argparse
+import os
+import sys
+
+from config.config import TABLE_PATHS, config
+from pipeline.data_cleaning import DataCleaningFactory, DataCleaningPipeline, set_copy_on_write
+from pipeline.extractor import DataExtractor
+from scripts.benchmark_cleaning_engines import best_time, difference
+
+
+def clean_sharded(table_name: str, df, *, workers: int, shards: int):
+    return DataCleaningPipeline({table_name: df}, workers=workers, shards=shards, shard_min_rows=0,
+                                compact=False).run()[table_name]
+
+
+if __name__ == "__main__":
+    set_copy_on_write()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=config['RAW_DATA_DIR'], help="directory with the raw CSV files")
+    parser.add_argument('--tables', nargs='*', help="tables to clean (default: all)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--shards', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--repeat', type=int, default=1, help="timed runs per mode, the best one is kept")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'table':<18}{'rows':>12}{'whole s':>10}{'sharded s':>11}{'speedup':>10}  parity")
+    for table_name, file_name in TABLE_PATHS.items():
+        path = os.path.join(args.data_dir, file_name)
+        if (args.tables and table_name not in args.tables) or not os.path.exists(path):
+            continue
+
+        df = DataExtractor('CSV', file_paths={table_name: path}).extract()[table_name]
+        whole = DataCleaningFactory.create_cleaner(table_name, df).clean()
+        sharded = clean_sharded(table_name, df, workers=args.workers, shards=args.shards)
+        whole_seconds = best_time(lambda: DataCleaningFactory.create_cleaner(table_name, df).clean(), args.repeat)
+        sharded_seconds = best_time(lambda: clean_sharded(table_name, df, workers=args.workers, shards=args.shards),
+                                    args.repeat)
+
+        problem = difference((whole, {}), (sharded, {}))
+        failed |= problem is not None
+        print(f"{table_name:<18}{len(df):>12,}{whole_seconds:>10.3f}{sharded_seconds:>11.3f}"
+              f"{whole_seconds / sharded_seconds:>9.2f}x  {problem[:300] if problem else 'identical'}")
+
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,194 @@
+"""Time and memory-profile every ETL stage per table: extract, clean and each load sink.
+
+Results are appended to a JSON Lines file together with the current git commit, so
+runs of different commits on the same data can be compared with --compare. Use the
+synthetic generator for larger volumes:
+
+    python -m scripts.generate_synthetic_data --scale 10 --output data/synthetic/sf10
+    python -m scripts.benchmark_stages --data-dir data/synthetic/sf10 --sinks CSV parquet postgres --memory --compare
+
+The postgres sink needs a local PostgreSQL instance configured through the POSTGRES_*
+variables in .env; it loads into a scratch schema which is dropped afterwards.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from config.config import TABLE_PATHS, config
+from pipeline.data_cleaning import DataCleaningFactory, set_copy_on_write
+from pipeline.extractor import DataExtractor
+from pipeline.loader import DataLoader
+
+SCHEMA = 'benchmark_stages'
+REGRESSION_RATIO = 1.2
+
+
+def git_commit() -> str:
+    """Short hash of HEAD, suffixed with '-dirty' when the working tree has changes."""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True,
+                               text=True, check=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def measure(func, *, repeat: int, memory: bool) -> tuple[float, float | None]:
+    """Return (best seconds, peak traced MiB or None). Memory is traced in a separate
+    call so tracemalloc overhead does not skew the timings."""
+    elapsed = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = min(elapsed, time.perf_counter() - start)
+
+    if not memory:
+        return elapsed, None
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak / 2 ** 20
+
+
+class StageBenchmark:
+    def __init__(self, data_dir: str, *, sinks: list[str], repeat: int, memory: bool):
+        self.data_dir = data_dir
+        self.sinks = sinks
+        self.repeat = repeat
+        self.memory = memory
+        self.commit = git_commit()
+        self.timestamp = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self.results = []
+
+    def record(self, stage: str, table_name: str, rows: int, func):
+        seconds, peak = measure(func, repeat=self.repeat, memory=self.memory)
+        result = {
+            'commit': self.commit, 'timestamp': self.timestamp, 'data_dir': self.data_dir,
+            'stage': stage, 'table': table_name, 'rows': rows, 'seconds': round(seconds, 4),
+            'rows_per_s': round(rows / seconds) if seconds else None,
+            'peak_mib': round(peak, 1) if peak is not None else None,
+        }
+        self.results.append(result)
+        print(f"{stage:<16}{table_name:<18}{rows:>12,}{seconds:>10.3f}{result['rows_per_s'] or 0:>12,}"
+              f"{'' if peak is None else f'{peak:>12.1f}'}")
+
+    def _load(self, sink: str, table_name: str, df, directory: str, engine):
+        loader = DataLoader(sink, dataframe_table_mapping={table_name: df}, schema=SCHEMA)
+        if sink == 'postgres':
+            loader.connector = engine
+            with engine.begin() as connection:
+                connection.execute(text(f'DROP TABLE IF EXISTS {SCHEMA}."{table_name}"'))
+            loader._postgres_load_data()
+        elif sink == 'CSV':
+            loader._csv_load_data(directory)
+        else:
+            loader._columnar_load_data(directory)
+
+    def run(self):
+        paths = {table_name: os.path.join(self.data_dir, file_name) for table_name, file_name in TABLE_PATHS.items()
+                 if os.path.exists(os.path.join(self.data_dir, file_name))}
+        print(f"{'stage':<16}{'table':<18}{'rows':>12}{'seconds':>10}{'rows/s':>12}"
+              f"{'peak MiB' if self.memory else '':>12}")
+
+        raw, cleaned = {}, {}
+        for table_name, path in paths.items():
+            raw[table_name] = DataExtractor('CSV', file_paths={table_name: path}).extract()[table_name]
+            self.record('extract', table_name, len(raw[table_name]),
+                        lambda: DataExtractor('CSV', file_paths={table_name: path}).extract())
+
+        for table_name, df in raw.items():
+            cleaned[table_name] = DataCleaningFactory.create_cleaner(table_name, df).clean()
+            self.record('clean', table_name, len(df),
+                        lambda: DataCleaningFactory.create_cleaner(table_name, df).clean())
+
+        engine = None
+        if 'postgres' in self.sinks:
+            engine = DataLoader('postgres', dataframe_table_mapping={}, schema=SCHEMA)._connection()
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+
+        try:
+            with tempfile.TemporaryDirectory(prefix="olist_benchmark_") as directory:
+                for sink in self.sinks:
+                    for table_name, df in cleaned.items():
+                        self.record(f"load_{sink.lower()}", table_name, len(df),
+                                    lambda: self._load(sink, table_name, df, directory, engine))
+        finally:
+            if engine is not None:
+                with engine.begin() as connection:
+                    connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                engine.dispose()
+        return self.results
+
+
+def load_results(path: str) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_results(path: str, results: list[dict]):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a') as file:
+        for result in results:
+            file.write(json.dumps(result) + '\n')
+
+
+def compare(previous: list[dict], current: list[dict]):
+    """Print each stage's time against the latest earlier run of another commit on the same data."""
+    if not current:
+        return
+    commit, data_dir = current[0]['commit'], current[0]['data_dir']
+    baseline = {}
+    for result in previous:
+        if result['data_dir'] == data_dir and result['commit'] != commit:
+            baseline[(result['stage'], result['table'])] = result  # later lines win
+
+    if not baseline:
+        print(f"\nNo earlier results of another commit on {data_dir} to compare with.")
+        return
+
+    print(f"\n{'stage':<16}{'table':<18}{'baseline':>10}{'seconds':>10}{'ratio':>8}  commit")
+    for result in current:
+        before = baseline.get((result['stage'], result['table']))
+        if before is None or not before['seconds']:
+            continue
+        ratio = result['seconds'] / before['seconds']
+        flag = '  REGRESSION' if ratio > REGRESSION_RATIO else ''
+        print(f"{result['stage']:<16}{result['table']:<18}{before['seconds']:>10.3f}{result['seconds']:>10.3f}"
+              f"{ratio:>8.2f}  {before['commit']}{flag}")
+
+
+if __name__ == "__main__":
+    set_copy_on_write()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data-dir', default=config['RAW_DATA_DIR'], help="directory with the raw CSV files")
+    parser.add_argument('--sinks', nargs='*', default=['CSV', 'parquet'],
+                        choices=['CSV', 'parquet', 'feather', 'postgres'])
+    parser.add_argument('--repeat', type=int, default=1, help="timed runs per stage, the best one is kept")
+    parser.add_argument('--memory', action='store_true', help="also trace peak memory (one extra run per stage)")
+    parser.add_argument('--results', default='benchmarks/results.jsonl')
+    parser.add_argument('--compare', action='store_true', help="compare with the previous commit's results")
+    args = parser.parse_args()
+
+    previous = load_results(args.results)
+    results = StageBenchmark(args.data_dir, sinks=args.sinks, repeat=args.repeat, memory=args.memory).run()
+    save_results(args.results, results)
+    print(f"\n{len(results)} results of commit {results[0]['commit'] if results else '-'} appended to {args.results}")
+    if args.compare:
+        compare(previous, results)
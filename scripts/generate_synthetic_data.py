@@ -0,0 +1,300 @@
+"""Generate synthetic, referentially consistent versions of the nine Olist CSV files.
+
+Row counts follow the public Olist dataset times --scale, so --scale 10 writes about
+10M geolocation points and 1M orders. The same --seed always produces the same files.
+Every order belongs to a generated customer, every item to a generated order, product
+and seller, and every customer and seller zip code prefix exists in geolocation. A
+small --dirty fraction of duplicated rows, missing delivery dates, out-of-order
+timestamps and out-of-range points gives the cleaners something to reject.
+
+Files are written with the raw column names (including the 'lenght' typos) and the
+file names of the *_PATH keys in config.yaml, so the output directory can replace
+data/raw. Run from the repository root:
+    python -m scripts.generate_synthetic_data --scale 1 --output data/synthetic/sf1
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from config.config import config
+
+# Row counts of the public Olist dataset
+BASE_ROWS = {
+    'customers': 99_441,
+    'geolocation': 1_000_163,
+    'order_items': 112_650,
+    'order_payments': 103_886,
+    'order_reviews': 99_224,
+    'orders': 99_441,
+    'products': 32_951,
+    'sellers': 3_095,
+    'zip_prefixes': 19_015,
+}
+
+STATES = np.array(['SP', 'RJ', 'MG', 'RS', 'PR', 'SC', 'BA', 'DF', 'ES', 'GO', 'PE', 'CE', 'PA', 'MT',
+                   'MA', 'MS', 'PB', 'PI', 'RN', 'AL', 'SE', 'TO', 'RO', 'AM', 'AC', 'AP', 'RR'])
+ORDER_STATUSES = np.array(['delivered', 'shipped', 'canceled', 'unavailable', 'invoiced', 'processing', 'created', 'approved'])
+STATUS_WEIGHTS = np.array([0.970, 0.011, 0.006, 0.006, 0.003, 0.003, 0.0005, 0.0005])
+PAYMENT_TYPES = np.array(['credit_card', 'boleto', 'voucher', 'debit_card'])
+PAYMENT_WEIGHTS = np.array([0.74, 0.19, 0.055, 0.015])
+CATEGORIES = 71
+CITIES = 4_000
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+START, END = pd.Timestamp('2016-09-01').value // 10 ** 9, pd.Timestamp('2018-10-01').value // 10 ** 9
+
+_HEX = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+
+
+def hex_ids(rng: np.random.Generator, n: int) -> np.ndarray:
+    """n unique 32-character hex ids like the Olist ones, built without a Python loop."""
+    raw = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16)
+    chars = np.empty((n, 32), dtype=np.uint8)
+    chars[:, 0::2] = _HEX[raw >> 4]
+    chars[:, 1::2] = _HEX[raw & 15]
+    return chars.view('S32').ravel().astype('U32')
+
+
+def timestamps(seconds: np.ndarray) -> pd.Series:
+    """Format epoch seconds (NaN for missing) like the raw files do.
+
+    The seconds are truncated to integers first: to_datetime's float path intermittently
+    raises FloatingPointError on arrays holding NaN.
+    """
+    missing = np.isnan(seconds)
+    values = pd.to_datetime(np.where(missing, 0, seconds).astype('int64'), unit='s').where(~missing)
+    return pd.Series(values).dt.strftime(TIMESTAMP_FORMAT)
+
+
+class OlistGenerator:
+    def __init__(self, scale: float, seed: int, dirty: float):
+        self.scale = scale
+        self.rng = np.random.default_rng(seed)
+        self.dirty = dirty
+
+    def rows(self, table: str) -> int:
+        return max(1, int(round(BASE_ROWS[table] * self.scale)))
+
+    def _dirty_rows(self, n: int) -> np.ndarray:
+        return self.rng.random(n) < self.dirty
+
+    def _with_duplicates(self, df: pd.DataFrame) -> pd.DataFrame:
+        duplicated = df.loc[self._dirty_rows(len(df))]
+        return pd.concat([df, duplicated], ignore_index=True)
+
+    def places(self):
+        """Zip prefixes with their state and city; the same for every table."""
+        n = self.rows('zip_prefixes')
+        self.zip_prefixes = np.sort(self.rng.choice(np.arange(1_000, 100_000), size=n, replace=False))
+        self.zip_states = STATES[np.minimum(self.zip_prefixes * len(STATES) // 100_000, len(STATES) - 1)]
+        self.zip_cities = np.char.add('cidade ', (self.zip_prefixes % CITIES).astype(str))
+        self.zip_lat = self.rng.uniform(-30.0, -3.0, n)
+        self.zip_lng = self.rng.uniform(-60.0, -36.0, n)
+
+    def _zip_sample(self, n: int) -> np.ndarray:
+        return self.rng.integers(0, len(self.zip_prefixes), n)
+
+    def geolocation(self) -> pd.DataFrame:
+        n = self.rows('geolocation')
+        at = self._zip_sample(n)
+        lat = self.zip_lat[at] + self.rng.normal(0, 0.02, n)
+        lat[self._dirty_rows(n)] = 45.0  # outside Brazil
+        return pd.DataFrame({
+            'geolocation_zip_code_prefix': self.zip_prefixes[at],
+            'geolocation_lat': lat.round(8),
+            'geolocation_lng': (self.zip_lng[at] + self.rng.normal(0, 0.02, n)).round(8),
+            'geolocation_city': self.zip_cities[at],
+            'geolocation_state': self.zip_states[at],
+        })
+
+    def categories(self) -> pd.DataFrame:
+        self.category_names = np.array([f"categoria_{i:02d}" for i in range(CATEGORIES)])
+        return pd.DataFrame({
+            'product_category_name': self.category_names,
+            'product_category_name_english': [f"category_{i:02d}" for i in range(CATEGORIES)],
+        })
+
+    def customers(self) -> pd.DataFrame:
+        n = self.rows('customers')
+        self.customer_ids = hex_ids(self.rng, n)
+        at = self._zip_sample(n)
+        unique_ids = hex_ids(self.rng, n)
+        repeat = self.rng.random(n) < 0.03  # returning customers share a customer_unique_id
+        unique_ids[repeat] = unique_ids[self.rng.integers(0, n, repeat.sum())]
+        return self._with_duplicates(pd.DataFrame({
+            'customer_id': self.customer_ids,
+            'customer_unique_id': unique_ids,
+            'customer_zip_code_prefix': self.zip_prefixes[at],
+            'customer_city': self.zip_cities[at],
+            'customer_state': self.zip_states[at],
+        }))
+
+    def sellers(self) -> pd.DataFrame:
+        n = self.rows('sellers')
+        self.seller_ids = hex_ids(self.rng, n)
+        at = self._zip_sample(n)
+        return self._with_duplicates(pd.DataFrame({
+            'seller_id': self.seller_ids,
+            'seller_zip_code_prefix': self.zip_prefixes[at],
+            'seller_city': self.zip_cities[at],
+            'seller_state': self.zip_states[at],
+        }))
+
+    def products(self) -> pd.DataFrame:
+        n = self.rows('products')
+        self.product_ids = hex_ids(self.rng, n)
+        self.product_prices = self.rng.lognormal(4.3, 0.9, n).round(2)
+        missing = self.rng.random(n) < 0.02
+        df = pd.DataFrame({
+            'product_id': self.product_ids,
+            'product_category_name': self.category_names[self.rng.integers(0, CATEGORIES, n)],
+            'product_name_lenght': self.rng.integers(5, 76, n),
+            'product_description_lenght': self.rng.integers(4, 3_993, n),
+            'product_photos_qty': self.rng.integers(1, 11, n),
+            'product_weight_g': self.rng.integers(50, 30_000, n),
+            'product_length_cm': self.rng.integers(7, 106, n),
+            'product_height_cm': self.rng.integers(2, 106, n),
+            'product_width_cm': self.rng.integers(6, 119, n),
+        })
+        columns = ['product_category_name', 'product_name_lenght', 'product_description_lenght', 'product_photos_qty']
+        df[columns[1:]] = df[columns[1:]].astype('Int64')
+        df.loc[missing, columns] = None
+        return self._with_duplicates(df)
+
+    def orders(self) -> pd.DataFrame:
+        n = self.rows('orders')
+        self.order_ids = hex_ids(self.rng, n)
+        self.order_customers = self.customer_ids[self.rng.permutation(len(self.customer_ids))[:n]] \
+            if n <= len(self.customer_ids) else self.customer_ids[self.rng.integers(0, len(self.customer_ids), n)]
+        status = self.rng.choice(ORDER_STATUSES, size=n, p=STATUS_WEIGHTS / STATUS_WEIGHTS.sum())
+
+        purchase = self.rng.integers(START, END, n).astype(float)
+        approved = purchase + self.rng.exponential(10 * 3600, n)
+        carrier = approved + self.rng.exponential(3 * 86400, n)
+        delivered = carrier + self.rng.exponential(9 * 86400, n)
+        estimated = np.floor((purchase + self.rng.normal(24, 8, n).clip(3) * 86400) / 86400) * 86400
+
+        not_shipped = np.isin(status, ['canceled', 'unavailable', 'invoiced', 'processing', 'created', 'approved'])
+        carrier[not_shipped] = np.nan
+        delivered[not_shipped | (status == 'shipped')] = np.nan
+        approved[status == 'created'] = np.nan
+
+        dirty = self._dirty_rows(n)
+        delivered[dirty & (status == 'delivered') & (self.rng.random(n) < 0.5)] = np.nan
+        early = dirty & ~np.isnan(carrier) & (self.rng.random(n) < 0.5)
+        carrier[early] = approved[early] - 86400  # handed to the carrier before approval
+        swapped = dirty & ~np.isnan(approved) & (self.rng.random(n) < 0.5)
+        approved[swapped] = purchase[swapped] - 3600  # approved before purchase
+
+        self.order_purchase = purchase
+        return self._with_duplicates(pd.DataFrame({
+            'order_id': self.order_ids,
+            'customer_id': self.order_customers,
+            'order_status': status,
+            'order_purchase_timestamp': timestamps(purchase),
+            'order_approved_at': timestamps(approved),
+            'order_delivered_carrier_date': timestamps(carrier),
+            'order_delivered_customer_date': timestamps(delivered),
+            'order_estimated_delivery_date': timestamps(estimated),
+        }))
+
+    def _per_order(self, table: str) -> np.ndarray:
+        """Order positions, each order repeated so the table reaches its target size."""
+        n_orders = len(self.order_ids)
+        extra = max(0, self.rows(table) - n_orders)
+        counts = np.ones(n_orders, dtype=np.int64)
+        np.add.at(counts, self.rng.integers(0, n_orders, extra), 1)
+        return np.repeat(np.arange(n_orders), counts)
+
+    @staticmethod
+    def _sequence(positions: np.ndarray) -> np.ndarray:
+        """1, 2, 3... within each run of equal, sorted positions."""
+        starts = np.r_[0, np.flatnonzero(np.diff(positions)) + 1]
+        lengths = np.diff(np.r_[starts, len(positions)])
+        return np.arange(len(positions)) - np.repeat(starts, lengths) + 1
+
+    def order_items(self) -> pd.DataFrame:
+        at = self._per_order('order_items')
+        n = len(at)
+        products = self.rng.integers(0, len(self.product_ids), n)
+        price = self.product_prices[products]
+        price[self._dirty_rows(n)] *= -1
+        return self._with_duplicates(pd.DataFrame({
+            'order_id': self.order_ids[at],
+            'order_item_id': self._sequence(at),
+            'product_id': self.product_ids[products],
+            'seller_id': self.seller_ids[self.rng.integers(0, len(self.seller_ids), n)],
+            'shipping_limit_date': timestamps(self.order_purchase[at] + 6 * 86400),
+            'price': price,
+            'freight_value': self.rng.gamma(2.0, 10.0, n).round(2),
+        }))
+
+    def order_payments(self) -> pd.DataFrame:
+        at = self._per_order('order_payments')
+        n = len(at)
+        payment_type = self.rng.choice(PAYMENT_TYPES, size=n, p=PAYMENT_WEIGHTS)
+        installments = np.where(payment_type == 'credit_card', self.rng.integers(1, 11, n), 1)
+        return self._with_duplicates(pd.DataFrame({
+            'order_id': self.order_ids[at],
+            'payment_sequential': self._sequence(at),
+            'payment_type': payment_type,
+            'payment_installments': installments,
+            'payment_value': self.rng.lognormal(4.6, 0.8, n).round(2),
+        }))
+
+    def order_reviews(self) -> pd.DataFrame:
+        n = min(self.rows('order_reviews'), len(self.order_ids))
+        at = np.sort(self.rng.choice(len(self.order_ids), size=n, replace=False))
+        created = np.floor(self.order_purchase[at] / 86400 + self.rng.integers(5, 30, n)) * 86400
+        answered = created + self.rng.exponential(2 * 86400, n)
+        answered[self._dirty_rows(n)] = created[0] - 86400
+        has_comment = self.rng.random(n) < 0.4
+        return self._with_duplicates(pd.DataFrame({
+            'review_id': hex_ids(self.rng, n),
+            'order_id': self.order_ids[at],
+            'review_score': self.rng.choice([1, 2, 3, 4, 5], size=n, p=[0.11, 0.03, 0.08, 0.19, 0.59]),
+            'review_comment_title': np.where(self.rng.random(n) < 0.1, 'recomendo', None),
+            'review_comment_message': np.where(has_comment, 'produto entregue dentro do prazo', None),
+            'review_creation_date': timestamps(created),
+            'review_answer_timestamp': timestamps(answered),
+        }))
+
+    def tables(self):
+        """Yield (table_name, file_name, frame) in dependency order, one table at a time."""
+        self.places()
+        yield config['GEOLOCATION_TABLE'], config['GEOLOCATION_PATH'], self.geolocation()
+        yield config['CATEGORIES_TABLE'], config['CATEGORIES_PATH'], self.categories()
+        yield config['CUSTOMERS_TABLE'], config['CUSTOMERS_PATH'], self.customers()
+        yield config['SELLERS_TABLE'], config['SELLERS_PATH'], self.sellers()
+        yield config['PRODUCTS_TABLE'], config['PRODUCTS_PATH'], self.products()
+        yield config['ORDERS_TABLE'], config['ORDERS_PATH'], self.orders()
+        yield config['ORDER_ITEMS_TABLE'], config['ORDER_ITEMS_PATH'], self.order_items()
+        yield config['ORDER_PAYMENTS_TABLE'], config['ORDER_PAYMENTS_PATH'], self.order_payments()
+        yield config['ORDER_REVIEWS_TABLE'], config['ORDER_REVIEWS_PATH'], self.order_reviews()
+
+
+def generate(output: str, *, scale: float = 1.0, seed: int = 42, dirty: float = 0.01) -> dict[str, str]:
+    """Write the nine CSV files to `output`. Returns the path of every table."""
+    os.makedirs(output, exist_ok=True)
+    paths = {}
+    for table_name, file_name, df in OlistGenerator(scale, seed, dirty).tables():
+        start = time.perf_counter()
+        paths[table_name] = os.path.join(output, file_name)
+        df.to_csv(paths[table_name], index=False)
+        print(f"{table_name:<18}{len(df):>12,} rows  {time.perf_counter() - start:>6.1f}s  {paths[table_name]}")
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', type=float, default=1.0, help="multiple of the Olist row counts")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--dirty', type=float, default=0.01, help="fraction of rows made invalid or duplicated")
+    parser.add_argument('--output', default=None, help="defaults to data/synthetic/sf<scale>")
+    args = parser.parse_args()
+
+    generate(args.output or f"data/synthetic/sf{args.scale:g}", scale=args.scale, seed=args.seed, dirty=args.dirty)
@@ -0,0 +1,64 @@
+import os
+import uuid
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from config.config import config, load_env
+from pipeline.data_cleaning import set_copy_on_write
+from scripts.generate_synthetic_data import OlistGenerator
+
+REPO = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope='session', autouse=True)
+def copy_on_write():
+    """Clean with the pandas options of a pipeline run."""
+    set_copy_on_write()
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Run in an empty directory: the state, quarantine, metrics and CSV output paths in
+    config.yaml are relative, so every file a run writes lands below tmp_path."""
+    (tmp_path / 'database').symlink_to(REPO / 'database')
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(config['CLEANED_DATA_DIR'])
+    return tmp_path
+
+
+@pytest.fixture(scope='session')
+def olist_tables() -> dict[str, pd.DataFrame]:
+    """Small, clean synthetic Olist tables keyed by table name."""
+    return {table_name: df for table_name, _, df in OlistGenerator(scale=0.01, seed=7, dirty=0.0).tables()}
+
+
+@pytest.fixture(scope='session')
+def dirty_olist_tables() -> dict[str, pd.DataFrame]:
+    """The synthetic Olist tables with 5% duplicated or invalid rows."""
+    return {table_name: df for table_name, _, df in OlistGenerator(scale=0.01, seed=7, dirty=0.05).tables()}
+
+
+@pytest.fixture
+def postgres_engine():
+    """The pooled engine configured by POSTGRES_*; tests using it are skipped without them."""
+    load_env()
+    if not os.getenv('POSTGRES_HOST'):
+        pytest.skip("POSTGRES_* is not set")
+    from pipeline.base_db_connection import get_engine
+
+    return get_engine('postgres')
+
+
+@pytest.fixture
+def stage_schema(postgres_engine) -> str:
+    """A throwaway copy of the schema in STAGE_SCHEMA_PATH, dropped after the test."""
+    name = f"test_stage_{uuid.uuid4().hex[:8]}"
+    sql = (REPO / config['STAGE_SCHEMA_PATH']).read_text()
+    sql = sql.replace('SCHEMA IF NOT EXISTS stage;', f'SCHEMA {name};').replace('stage.', f'{name}.')
+    with postgres_engine.begin() as connection:
+        connection.exec_driver_sql(sql)
+    yield name
+    with postgres_engine.begin() as connection:
+        connection.exec_driver_sql(f"DROP SCHEMA {name} CASCADE")
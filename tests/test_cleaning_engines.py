@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+from config.config import config
+from pipeline.data_cleaning import DataCleaningFactory
+
+pytest.importorskip('polars')
+
+POLARS_TABLES = [table_name for table_name in DataCleaningFactory.cleaner_map
+                 if 'polars' in DataCleaningFactory.get_cleaner_class(table_name).engines]
+
+
+def clean(table_name: str, df: pd.DataFrame):
+    cleaner = DataCleaningFactory.create_cleaner(table_name, df)
+    return cleaner.clean(), cleaner.rule_report
+
+
+@pytest.mark.parametrize('table_name', POLARS_TABLES)
+def test_polars_engine_cleans_exactly_like_pandas(dirty_olist_tables, monkeypatch, table_name):
+    df = dirty_olist_tables[table_name]
+    expected, expected_report = clean(table_name, df)
+
+    monkeypatch.setitem(config, 'CLEANING_ENGINES', {table_name: 'polars'})
+    actual, actual_report = clean(table_name, df)
+
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True, check_categorical=True)
+    assert actual_report == expected_report
@@ -0,0 +1,39 @@
+import pandas as pd
+import pytest
+
+from pipeline.data_cleaning import DataCleaningFactory, DataCleaningPipeline
+from pipeline.data_processors.base_cleaner import union_categories
+
+
+@pytest.fixture(scope='module')
+def serially_cleaned(dirty_olist_tables) -> dict[str, pd.DataFrame]:
+    return {table_name: DataCleaningFactory.create_cleaner(table_name, df).clean()
+            for table_name, df in dirty_olist_tables.items()}
+
+
+@pytest.mark.parametrize('options', [{'workers': 2}, {'workers': 2, 'shards': 3, 'shard_min_rows': 0}],
+                         ids=['parallel', 'sharded'])
+def test_process_pool_cleans_exactly_like_serial_clean(dirty_olist_tables, serially_cleaned, options):
+    cleaned = DataCleaningPipeline(dict(dirty_olist_tables), compact=False, **options).run()
+
+    assert list(cleaned) == list(serially_cleaned)
+    for table_name, expected in serially_cleaned.items():
+        pd.testing.assert_frame_equal(cleaned[table_name], expected, check_exact=True, obj=table_name)
+
+
+def test_streaming_in_small_chunks_cleans_exactly_like_clean(olist_tables):
+    # duplicates of earlier rows, shuffled so most of them land in other chunks than their originals
+    raw = {table_name: pd.concat([df, df.sample(frac=0.2, random_state=1)]).sample(frac=1, random_state=2)
+           for table_name, df in olist_tables.items()}
+    chunks = ((table_name, df.iloc[start:start + 97]) for table_name, df in raw.items()
+              for start in range(0, len(df), 97))
+
+    streamed = {}
+    for table_name, chunk in DataCleaningPipeline(chunks).run_stream():
+        streamed.setdefault(table_name, []).append(chunk)
+
+    for table_name, df in raw.items():
+        expected = DataCleaningFactory.create_cleaner(table_name, df).clean()
+        actual = pd.concat(union_categories(streamed[table_name]))
+        # geolocation sums its coordinates chunk by chunk, so only their last bits may differ
+        pd.testing.assert_frame_equal(actual, expected, check_exact=False, rtol=1e-12, obj=table_name)
@@ -0,0 +1,31 @@
+import pytest
+
+from pipeline.data_cleaning import DataCleaningFactory
+from pipeline.extractor import DataExtractor
+from scripts.generate_synthetic_data import generate
+
+# raw rows, rows kept, and rows rejected by each default rule in config.yaml on the
+# synthetic data below; a change here means the cleaned output changed
+EXPECTED = {
+    'ORDERS': (1046, 950, {'delivered_orders_have_dates': 32, 'order_timestamps_in_order': 33}),
+    'ORDER_ITEMS': (1185, 1073, {'price_not_negative': 53, 'freight_value_not_negative': 0}),
+    'ORDER_PAYMENTS': (1083, 1039, {'payment_value_not_negative': 0, 'installments_not_negative': 0}),
+    'ORDER_REVIEWS': (1028, 975, {'review_score_1_to_5': 0, 'answered_after_creation': 17}),
+}
+
+
+@pytest.fixture(scope='module')
+def dirty_paths(tmp_path_factory) -> dict[str, str]:
+    return generate(str(tmp_path_factory.mktemp('raw')), scale=0.01, seed=7, dirty=0.05)
+
+
+@pytest.mark.parametrize('table_name', EXPECTED)
+def test_default_rules_reject_the_pinned_rows(dirty_paths, table_name):
+    raw_rows, kept_rows, rule_report = EXPECTED[table_name]
+    df = DataExtractor('CSV', file_paths={table_name: dirty_paths[table_name]}).extract()[table_name]
+    cleaner = DataCleaningFactory.create_cleaner(table_name, df)
+
+    cleaned = cleaner.clean()
+
+    assert (len(df), len(cleaned)) == (raw_rows, kept_rows)
+    assert cleaner.rule_report == rule_report
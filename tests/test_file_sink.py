@@ -0,0 +1,46 @@
+import os
+
+import pandas as pd
+
+from config.config import config
+from pipeline.compaction import compact_dtypes
+from pipeline.data_cleaning import DataCleaningPipeline
+from pipeline.file_sink import ColumnarFileSink
+
+ORDER_ITEMS = config['ORDER_ITEMS_TABLE']
+
+
+def test_rewriting_a_table_swaps_the_link_to_the_new_version(tmp_path):
+    sink = ColumnarFileSink(str(tmp_path), partitions={})
+    sink.write({'SELLERS': pd.DataFrame({'seller_id': ['a', 'b']})})
+    first_version = os.path.realpath(tmp_path / 'SELLERS')
+
+    sink.write({'SELLERS': pd.DataFrame({'seller_id': ['c']})})
+
+    assert os.path.islink(tmp_path / 'SELLERS')
+    assert not os.path.exists(first_version)
+    assert pd.read_parquet(tmp_path / 'SELLERS')['seller_id'].tolist() == ['c']
+
+
+def test_a_directory_from_the_rename_swap_is_replaced_by_a_link(tmp_path):
+    (tmp_path / 'SELLERS').mkdir()
+    pd.DataFrame({'seller_id': ['a']}).to_parquet(tmp_path / 'SELLERS' / 'part-0.parquet')
+
+    ColumnarFileSink(str(tmp_path), partitions={}).write({'SELLERS': pd.DataFrame({'seller_id': ['b']})})
+
+    assert os.path.islink(tmp_path / 'SELLERS')
+    assert pd.read_parquet(tmp_path / 'SELLERS')['seller_id'].tolist() == ['b']
+    assert sorted(os.listdir(tmp_path)) == sorted(['SELLERS', os.path.basename(os.path.realpath(tmp_path / 'SELLERS'))])
+
+
+def test_compacted_tables_are_written_with_their_original_dtypes(tmp_path, olist_tables):
+    cleaned = DataCleaningPipeline({ORDER_ITEMS: olist_tables[ORDER_ITEMS]}, workers=1, compact=False).run()[ORDER_ITEMS]
+    compacted, _ = compact_dtypes(cleaned)
+    assert (compacted.dtypes != cleaned.dtypes).any()
+
+    for file_format, read in (('parquet', pd.read_parquet), ('feather', pd.read_feather)):
+        directory = tmp_path / file_format
+        ColumnarFileSink(str(directory), file_format=file_format, partitions={}).write({ORDER_ITEMS: compacted})
+        written = read(directory / ORDER_ITEMS) if file_format == 'parquet' else \
+            read(next((directory / ORDER_ITEMS).iterdir()))
+        assert written.dtypes.to_dict() == cleaned.dtypes.to_dict()
@@ -0,0 +1,142 @@
+import glob
+
+import pandas as pd
+import pytest
+
+from config.config import config
+from etl_pipeline import ETLPipeline
+
+ORDERS = config['ORDERS_TABLE']
+ORDER_ITEMS = config['ORDER_ITEMS_TABLE']
+
+
+def write_raw(directory, tables: dict[str, pd.DataFrame]) -> dict[str, str]:
+    paths = {}
+    for table_name, df in tables.items():
+        paths[table_name] = str(directory / f"{table_name}.csv")
+        df.to_csv(paths[table_name], index=False)
+    return paths
+
+
+def run_incremental(paths: dict[str, str]):
+    ETLPipeline(
+        extractor_pipeline_args={'extractor_source': 'CSV', 'file_paths': paths, 'incremental': True},
+        loading_pipeline_args={'source': 'CSV', 'schema': None}
+    ).run()
+
+
+def quarantined(table_name: str) -> int:
+    return sum(len(pd.read_csv(path)) for path in glob.glob(f"{config['QUARANTINE_DIR']}*/{table_name}.csv"))
+
+
+def test_children_of_parents_loaded_by_an_earlier_run_are_not_orphans(workdir, olist_tables):
+    orders = olist_tables[ORDERS].sort_values('order_purchase_timestamp', ignore_index=True)
+    items = olist_tables[ORDER_ITEMS]
+    first_orders = orders.iloc[:len(orders) // 2]
+    first_items = items[items['order_id'].isin(first_orders['order_id'])]
+    # items arriving with the second run still reference orders of the first one
+    late_items = first_items.iloc[len(first_items) // 2:]
+    first_items = first_items.iloc[:len(first_items) // 2]
+    raw = workdir / 'raw'
+    raw.mkdir()
+
+    run_incremental(write_raw(raw, {ORDERS: first_orders, ORDER_ITEMS: first_items}))
+    assert quarantined(ORDER_ITEMS) == 0
+
+    second_items = pd.concat([first_items, late_items, items[~items['order_id'].isin(first_orders['order_id'])]])
+    run_incremental(write_raw(raw, {ORDERS: orders, ORDER_ITEMS: second_items}))
+    assert len(late_items) > 0
+    assert quarantined(ORDER_ITEMS) == 0
+
+
+def cleaned(table_name: str) -> pd.DataFrame:
+    return pd.read_csv(f"{config['CLEANED_DATA_DIR']}{table_name}.csv")
+
+
+def test_csv_target_accumulates_the_rows_of_every_run(workdir, olist_tables):
+    orders = olist_tables[ORDERS].sort_values('order_purchase_timestamp', ignore_index=True)
+    raw = workdir / 'raw'
+    raw.mkdir()
+
+    run_incremental(write_raw(raw, {ORDERS: orders.iloc[:len(orders) // 2]}))
+    run_incremental(write_raw(raw, {ORDERS: orders}))
+
+    output = cleaned(ORDERS)
+    assert len(output) == len(orders)
+    assert output['order_id'].is_unique
+
+
+def test_rows_appended_to_a_table_without_watermark_are_loaded_once(workdir, olist_tables):
+    items = olist_tables[ORDER_ITEMS]
+    raw = workdir / 'raw'
+    raw.mkdir()
+    paths = write_raw(raw, {ORDER_ITEMS: items.iloc[:len(items) // 2]})
+    run_incremental(paths)
+    items.iloc[len(items) // 2:].to_csv(paths[ORDER_ITEMS], mode='a', header=False, index=False)
+    run_incremental(paths)
+
+    output = cleaned(ORDER_ITEMS)
+    assert len(output) == len(items)
+    assert not output.duplicated(['order_id', 'order_item_id']).any()
+
+
+def test_rewritten_table_without_watermark_is_refused_when_appending(workdir, olist_tables):
+    items = olist_tables[ORDER_ITEMS]
+    raw = workdir / 'raw'
+    raw.mkdir()
+    run_incremental(write_raw(raw, {ORDER_ITEMS: items.iloc[1:]}))
+
+    with pytest.raises(ValueError, match='rewritten'):
+        run_incremental(write_raw(raw, {ORDER_ITEMS: items}))
+    assert len(cleaned(ORDER_ITEMS)) == len(items) - 1
+
+
+def test_late_rows_at_the_watermark_are_loaded_once(workdir, olist_tables):
+    orders = olist_tables[ORDERS].sort_values('order_purchase_timestamp', ignore_index=True)
+    first_orders = orders.iloc[:len(orders) // 2]
+    # arrives after the first run with the timestamp of its newest order
+    late_order = orders.iloc[[len(orders) // 2]].assign(
+        order_purchase_timestamp=first_orders['order_purchase_timestamp'].iloc[-1])
+    raw = workdir / 'raw'
+    raw.mkdir()
+
+    run_incremental(write_raw(raw, {ORDERS: first_orders}))
+    run_incremental(write_raw(raw, {ORDERS: pd.concat([first_orders, late_order])}))
+
+    output = cleaned(ORDERS)
+    assert len(output) == len(first_orders) + 1
+    assert output['order_id'].is_unique
+
+
+def test_rows_without_a_valid_watermark_are_loaded_once(workdir, olist_tables):
+    orders = olist_tables[ORDERS].sort_values('order_purchase_timestamp', ignore_index=True)
+    orders.loc[[1, len(orders) - 1], 'order_purchase_timestamp'] = None
+    raw = workdir / 'raw'
+    raw.mkdir()
+
+    run_incremental(write_raw(raw, {ORDERS: orders.iloc[:len(orders) // 2]}))
+    run_incremental(write_raw(raw, {ORDERS: orders}))
+    run_incremental(write_raw(raw, {ORDERS: orders.iloc[::-1]}))
+
+    output = cleaned(ORDERS)
+    assert len(output) == len(orders)
+    assert output['order_id'].is_unique
+
+
+def test_children_of_parents_rejected_by_an_earlier_run_are_orphans(workdir, olist_tables):
+    orders = olist_tables[ORDERS].sort_values('order_purchase_timestamp', ignore_index=True)
+    items = olist_tables[ORDER_ITEMS]
+    # delivered without a delivery date: dropped by the delivered_orders_have_dates rule
+    rejected = orders.index[(orders['order_status'] == 'delivered') & orders['order_id'].isin(items['order_id'])][0]
+    orders.loc[rejected, 'order_delivered_customer_date'] = None
+    rejected_id = orders.loc[rejected, 'order_id']
+    raw = workdir / 'raw'
+    raw.mkdir()
+    paths = write_raw(raw, {ORDERS: orders, ORDER_ITEMS: items[items['order_id'] != rejected_id]})
+    run_incremental(paths)
+
+    items[items['order_id'] == rejected_id].to_csv(paths[ORDER_ITEMS], mode='a', header=False, index=False)
+    run_incremental(paths)
+
+    assert quarantined(ORDER_ITEMS) == (items['order_id'] == rejected_id).sum()
+    assert rejected_id not in set(cleaned(ORDER_ITEMS)['order_id'])
@@ -0,0 +1,56 @@
+import pandas as pd
+
+from pipeline.data_cleaning import DataCleaningPipeline
+from pipeline.loader import DataLoader
+
+
+def test_merge_keeps_the_last_row_of_each_primary_key():
+    # sellers are deduplicated on whole rows, so a seller can reach the loader twice
+    sellers = pd.DataFrame({'seller_id': ['a', 'a', 'b'], 'seller_city': ['santos', 'campinas', 'recife']})
+
+    merged = DataLoader._drop_duplicate_keys('SELLERS', sellers, ['seller_id'])
+
+    assert merged['seller_id'].tolist() == ['a', 'b']
+    assert merged['seller_city'].tolist() == ['campinas', 'recife']
+
+
+def row_counts(engine, schema: str, table_names) -> dict[str, int]:
+    with engine.connect() as connection:
+        return {table_name: connection.exec_driver_sql(f"SELECT COUNT(*) FROM {schema}.{table_name.lower()}").scalar()
+                for table_name in table_names}
+
+
+def test_merging_twice_leaves_the_row_counts_unchanged(postgres_engine, stage_schema, olist_tables):
+    cleaned = DataCleaningPipeline(dict(olist_tables), workers=1).run()
+
+    def merge():
+        DataLoader('postgres', dataframe_table_mapping=cleaned, schema=stage_schema, load_mode='merge',
+                   connector=postgres_engine).load_data()
+
+    merge()
+    first = row_counts(postgres_engine, stage_schema, cleaned)
+    merge()
+
+    assert first == {table_name: len(df) for table_name, df in cleaned.items()}
+    assert row_counts(postgres_engine, stage_schema, cleaned) == first
+
+
+def test_copy_loads_the_same_rows_as_to_sql(postgres_engine, stage_schema):
+    df = pd.DataFrame({
+        'order_id': ['a', 'b', 'c', 'd'],
+        'order_status': ['delivered', '', None, 'with "quotes", commas\nand a newline'],
+        'order_purchase_timestamp': pd.to_datetime(['2017-10-02 10:56:33.123456', None,
+                                                    '2018-07-24 20:41:37.000000', '2018-08-08 08:38:49.000001']),
+        'price': [29.99, None, 0.0, 1e6],
+    })
+
+    for method in ('copy', 'to_sql'):
+        DataLoader('postgres', dataframe_table_mapping={method: df}, schema=stage_schema,
+                   postgres_load_method=method, connector=postgres_engine).load_data()
+
+    def read(table_name):
+        return pd.read_sql(f"SELECT * FROM {stage_schema}.{table_name} ORDER BY order_id", postgres_engine)
+
+    copied = read('copy')
+    pd.testing.assert_frame_equal(copied, read('to_sql'))
+    pd.testing.assert_frame_equal(copied, df)
@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+from scheduled_run_etl import ETL, RunLock
+
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_an_overlapping_run_is_refused(tmp_path):
+    lock, other_process = RunLock(str(tmp_path / 'etl.lock')), RunLock(str(tmp_path / 'etl.lock'))
+    assert lock.acquire()
+
+    assert not lock.acquire()
+    assert not other_process.acquire()
+
+    lock.release()
+    assert other_process.acquire()
+    other_process.release()
+
+
+def test_the_lock_is_released_after_failing_to_open_its_file(tmp_path):
+    (tmp_path / 'file').write_text('')
+    lock = RunLock(str(tmp_path / 'file' / 'etl.lock'))
+
+    with pytest.raises(OSError):
+        lock.acquire()
+
+    lock.path = str(tmp_path / 'etl.lock')
+    assert lock.acquire()
+    lock.release()
+
+
+def test_changed_files_trigger_a_run_once_they_stay_the_same_for_a_poll(workdir):
+    watch_dir = workdir / 'raw'
+    watch_dir.mkdir()
+    etl = ETL()
+    runs = []
+    etl.run = lambda: runs.append(time.monotonic())
+    daemon = threading.Thread(target=etl.serve, kwargs={'interval': 0, 'watch_dir': str(watch_dir), 'poll': 0.05})
+    daemon.start()
+    try:
+        assert wait_until(lambda: len(runs) == 1)  # the run at startup
+
+        # a file still being written does not trigger a run
+        with open(watch_dir / 'orders.csv', 'w') as file:
+            for _ in range(40):
+                file.write('row\n')
+                file.flush()
+                time.sleep(0.01)
+        written = time.monotonic()
+        assert len(runs) == 1
+
+        assert wait_until(lambda: len(runs) == 2)
+        assert runs[1] >= written
+        time.sleep(0.2)
+        assert len(runs) == 2
+    finally:
+        etl.stop_event.set()
+        daemon.join()
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from pipeline.snowflake_stage import LocalStage, copy_into_sql, create_stage_sql, staged_load
+
+
+def test_staged_load_round_trips_a_table_split_into_several_files(tmp_path):
+    rows = 25
+    df = pd.DataFrame({
+        'order_id': pd.array([f"order-{i}" if i % 7 else None for i in range(rows)], dtype='string'),
+        'price': [float(i) if i % 5 else np.nan for i in range(rows)],
+        'order_purchase_timestamp': [pd.Timestamp('2018-01-01 10:00:00.123456') + pd.Timedelta(days=i)
+                                     if i % 6 else pd.NaT for i in range(rows)],
+    })
+    stage = LocalStage(str(tmp_path / 'stage'), stage='olist_stage')
+
+    staged_load(stage, 'STAGE.ORDERS', df, rows_per_file=10)
+
+    loaded = stage.tables['STAGE.ORDERS']
+    loaded['order_purchase_timestamp'] = loaded['order_purchase_timestamp'].astype('datetime64[ns]')
+    pd.testing.assert_frame_equal(loaded, df, check_dtype=False)
+    assert loaded['order_purchase_timestamp'].iloc[1] == pd.Timestamp('2018-01-02 10:00:00.123456')
+    assert loaded['order_id'].isna().sum() == df['order_id'].isna().sum()
+
+    create, *puts, copy = stage.statements
+    assert create == create_stage_sql('olist_stage')
+    assert [put.split("' ")[0].rsplit('/', 1)[1] for put in puts] == \
+        ['part-00000.parquet', 'part-00001.parquet', 'part-00002.parquet']
+    assert all(put.endswith("@olist_stage/stage_orders/ AUTO_COMPRESS = FALSE OVERWRITE = TRUE") for put in puts)
+    assert copy == copy_into_sql('STAGE.ORDERS', 'olist_stage', 'stage_orders')
+    # PURGE = TRUE
+    assert not (tmp_path / 'stage' / 'stage_orders').exists()